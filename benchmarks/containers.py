@@ -0,0 +1,248 @@
+# Compares the MP4 and Matroska header readers with libmediainfo.
+#
+# Generates the sample files in a temporary directory: MP4 with the moov box
+# before and after the media data, Matroska with an audio track before the
+# video track in an unknown-size segment, and MP4 the header readers must
+# leave to libmediainfo (fragmented, zero and unknown durations). Checks that
+# the readers agree with libmediainfo, then times both.
+#
+#   python benchmarks/containers.py [files per format]
+import os
+import struct
+import sys
+import tempfile
+import time
+
+from pymediainfo import MediaInfo
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from folderplay.containers import read_container_info  # noqa: E402
+
+PAYLOAD_SIZE = 2 * 2**20
+ROUNDS = 3
+
+
+def box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def full_box(kind: bytes, payload: bytes) -> bytes:
+    return box(kind, bytes(4) + payload)
+
+
+def mvhd(timescale: int, duration: int) -> bytes:
+    return full_box(
+        b"mvhd", struct.pack(">IIII", 0, 0, timescale, duration) + bytes(80)
+    )
+
+
+def tkhd(track_id: int, duration: int, width: int, height: int) -> bytes:
+    payload = struct.pack(">IIII", 0, 0, track_id, 0)
+    payload += struct.pack(">I", duration) + bytes(52)
+    payload += struct.pack(">II", width << 16, height << 16)
+    return full_box(b"tkhd", payload)
+
+
+def mdia(timescale: int, duration: int, handler: bytes, width, height):
+    mdhd = full_box(
+        b"mdhd", struct.pack(">IIIIHH", 0, 0, timescale, duration, 0x55C4, 0)
+    )
+    hdlr = full_box(
+        b"hdlr", struct.pack(">I4s", 0, handler) + bytes(12) + b"x\0"
+    )
+    if handler == b"vide":
+        entry = box(
+            b"avc1",
+            bytes(6)
+            + struct.pack(">H", 1)
+            + bytes(16)
+            + struct.pack(">HHII", width, height, 0x480000, 0x480000)
+            + bytes(4)
+            + struct.pack(">H", 1)
+            + bytes(32)
+            + struct.pack(">Hh", 24, -1),
+        )
+        header = full_box(b"vmhd", bytes(8))
+    else:
+        entry = box(
+            b"mp4a",
+            bytes(6)
+            + struct.pack(">H", 1)
+            + bytes(8)
+            + struct.pack(">HHHHI", 2, 16, 0, 0, 48000 << 16),
+        )
+        header = full_box(b"smhd", bytes(4))
+    stbl = box(
+        b"stbl",
+        full_box(b"stsd", struct.pack(">I", 1) + entry)
+        + full_box(b"stts", struct.pack(">I", 0))
+        + full_box(b"stsc", struct.pack(">I", 0))
+        + full_box(b"stsz", struct.pack(">II", 0, 0))
+        + full_box(b"stco", struct.pack(">I", 0)),
+    )
+    dinf = box(
+        b"dinf",
+        full_box(b"dref", struct.pack(">I", 1) + full_box(b"url ", b"")),
+    )
+    return box(b"mdia", mdhd + hdlr + box(b"minf", header + dinf + stbl))
+
+
+def write_mp4(path, duration, width, height, moov_first=True, mvex=False):
+    timescale = 90000
+    audio = tkhd(1, duration // 2, 0, 0)
+    audio += mdia(timescale, duration // 2, b"soun", 0, 0)
+    video = tkhd(2, duration, width, height)
+    video += mdia(timescale, duration, b"vide", width, height)
+    moov = mvhd(timescale, duration) + box(b"trak", audio)
+    moov += box(b"trak", video)
+    if mvex:
+        moov += box(
+            b"mvex", full_box(b"trex", struct.pack(">I", 2) + bytes(16))
+        )
+    moov = box(b"moov", moov)
+    ftyp = box(b"ftyp", b"isom" + bytes(4) + b"isomiso2mp41")
+    mdat = box(b"mdat", bytes(PAYLOAD_SIZE))
+    with open(path, "wb") as f:
+        f.write(ftyp + (moov + mdat if moov_first else mdat + moov))
+
+
+def ebml_size(size: int) -> bytes:
+    for length in range(1, 9):
+        if size < (1 << (7 * length)) - 1:
+            return ((1 << (7 * length)) | size).to_bytes(length, "big")
+    raise ValueError("Size too large")
+
+
+def ebml(element_id: int, payload: bytes) -> bytes:
+    id_length = (element_id.bit_length() + 7) // 8
+    return (
+        element_id.to_bytes(id_length, "big")
+        + ebml_size(len(payload))
+        + payload
+    )
+
+
+def ebml_uint(element_id: int, value: int) -> bytes:
+    length = max(1, (value.bit_length() + 7) // 8)
+    return ebml(element_id, value.to_bytes(length, "big"))
+
+
+def write_matroska(path, duration_ms, width, height):
+    header = ebml(
+        0x1A45DFA3,
+        ebml_uint(0x4286, 1)
+        + ebml_uint(0x42F7, 1)
+        + ebml_uint(0x42F2, 4)
+        + ebml_uint(0x42F3, 8)
+        + ebml(0x4282, b"matroska")
+        + ebml_uint(0x4287, 4)
+        + ebml_uint(0x4285, 2),
+    )
+    info = ebml(
+        0x1549A966,
+        ebml_uint(0x2AD7B1, 1000000)
+        + ebml(0x4489, struct.pack(">d", float(duration_ms)))
+        + ebml(0x4D80, b"x")
+        + ebml(0x5741, b"x"),
+    )
+    audio = ebml(
+        0xAE,
+        ebml_uint(0xD7, 1)
+        + ebml_uint(0x73C5, 1)
+        + ebml_uint(0x83, 2)
+        + ebml(0x86, b"A_AAC")
+        + ebml(0xE1, ebml_uint(0x9F, 2)),
+    )
+    video = ebml(
+        0xAE,
+        ebml_uint(0xD7, 2)
+        + ebml_uint(0x73C5, 2)
+        + ebml_uint(0x83, 1)
+        + ebml(0x86, b"V_MPEG4/ISO/AVC")
+        + ebml(0xE0, ebml_uint(0xB0, width) + ebml_uint(0xBA, height)),
+    )
+    cluster = ebml(
+        0x1F43B675, ebml_uint(0xE7, 0) + ebml(0xA3, bytes(PAYLOAD_SIZE))
+    )
+    # Unknown-size segment, as written by live muxers
+    segment = bytes.fromhex("18538067") + bytes.fromhex("01ffffffffffffff")
+    segment += info + ebml(0x1654AE6B, audio + video) + cluster
+    with open(path, "wb") as f:
+        f.write(header + segment)
+
+
+def media_info(path: str):
+    tracks = MediaInfo.parse(path).tracks
+    video = [t for t in tracks if t.track_type == "Video"]
+    if not video:
+        return None
+    general = [t for t in tracks if t.track_type == "General"][0]
+    duration = video[0].duration or general.duration
+    return int(float(duration)) // 1000, video[0].width, video[0].height
+
+
+def generate(directory: str, count: int):
+    medias = []
+    for i in range(count):
+        path = os.path.join(directory, "{}.mp4".format(i))
+        write_mp4(path, 90000 * (600 + i), 1920, 1080, moov_first=i % 2)
+        medias.append(path)
+        path = os.path.join(directory, "{}.mkv".format(i))
+        write_matroska(path, 1000 * (1300 + i) + 400, 1280, 720)
+        medias.append(path)
+    # The header readers must leave these to libmediainfo
+    fallbacks = []
+    for name, duration, mvex in (
+        ("fragmented", 90000 * 600, True),
+        ("zero", 0, False),
+        ("unknown", 2**32 - 1, False),
+    ):
+        path = os.path.join(directory, name + ".mp4")
+        write_mp4(path, duration, 1920, 1080, mvex=mvex)
+        fallbacks.append(path)
+    return medias, fallbacks
+
+
+def timed(function, paths: list) -> float:
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        for path in paths:
+            function(path)
+    return (time.perf_counter() - started) / (ROUNDS * len(paths))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    with tempfile.TemporaryDirectory() as directory:
+        medias, fallbacks = generate(directory, count)
+        mismatches = 0
+        for path in medias:
+            header, parsed = read_container_info(path), media_info(path)
+            if header != parsed:
+                mismatches += 1
+                print("Mismatch {}: {} != {}".format(path, header, parsed))
+        for path in fallbacks:
+            header = read_container_info(path)
+            if header is not None:
+                mismatches += 1
+                print("Not left to libmediainfo {}: {}".format(path, header))
+        print(
+            "{} mismatches in {} files".format(
+                mismatches, len(medias) + len(fallbacks)
+            )
+        )
+        for extension in (".mp4", ".mkv"):
+            paths = [p for p in medias if p.endswith(extension)]
+            header = timed(read_container_info, paths)
+            parsed = timed(MediaInfo.parse, paths)
+            print(
+                "{} header {:.3f} ms/file, libmediainfo {:.3f} ms/file".format(
+                    extension, header * 1000, parsed * 1000
+                )
+            )
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+# Measures the memory held by MediaRecord with tracemalloc.
+#
+# Builds synthetic paths shaped like a NAS library, a few levels of shows and
+# seasons with long episode names, then reports the bytes per media of the
+# path strings alone, of pathlib.Path objects and of MediaRecord objects on
+# top of their path strings.
+#
+#   python benchmarks/memory.py [number of medias]
+#
+# On 1M medias with Python 3.11:
+#
+#   path strings     159 bytes/media
+#   pathlib.Path     354 bytes/media
+#   MediaRecord      294 bytes/media
+#
+# A record costs 120 bytes for its 11 slots, 106 for the title string and 56
+# for the sort key tuple, which reuses the title. The rest is the directory
+# strings of the sort keys.
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from folderplay.media import MediaRecord  # noqa: E402
+
+EPISODES_PER_SEASON = 24
+SEASONS_PER_SHOW = 8
+
+
+def media_paths(count: int) -> list:
+    paths = []
+    for i in range(count):
+        episode = i % EPISODES_PER_SEASON
+        season = i // EPISODES_PER_SEASON % SEASONS_PER_SHOW
+        show = i // (EPISODES_PER_SEASON * SEASONS_PER_SHOW)
+        paths.append(
+            "/mnt/nas/media/TV Shows/Show {0:05d}/Season {1:02d}/"
+            "Show {0:05d} - S{1:02d}E{2:02d} - Episode Title "
+            "1080p WEB-DL x264.mkv".format(show, season + 1, episode + 1)
+        )
+    return paths
+
+
+def allocated(build, *args):
+    """Returns the result of `build` and the bytes it left allocated."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(*args)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    paths, path_bytes = allocated(media_paths, count)
+    print("{} medias".format(count))
+    print("path strings  {:6.0f} bytes/media".format(path_bytes / count))
+    _, pathlib_bytes = allocated(lambda: [Path(p) for p in paths])
+    print("pathlib.Path  {:6.0f} bytes/media".format(pathlib_bytes / count))
+    # The records keep the path strings, only what they add is counted
+    _, record_bytes = allocated(lambda: [MediaRecord(p) for p in paths])
+    print("MediaRecord   {:6.0f} bytes/media".format(record_bytes / count))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,132 +1,81 @@
 import logging
+import multiprocessing
 import os
-import shutil
-import sys
 
 import click
-from PyQt5.QtCore import Qt, QFileInfo, QCoreApplication
-from PyQt5.QtGui import QFontDatabase, QFont
-from PyQt5.QtWidgets import QApplication
 
-from folderplay.config import Config
 from folderplay import __version__ as about
-from folderplay.constants import FONT_SIZE, EXIT_CODE_REBOOT
-from folderplay.gui.icons import IconSet
-from folderplay.gui.label import DurationLabel
-from folderplay.gui.progressbar import BidirectionalProgressBar
-from folderplay.gui.styles import Style
-from folderplay.player import Player
-from folderplay.utils import resource_path, is_windows
-
-click.echo(click.style(about.__doc__, fg="blue"))
-
-
-def setup_logging():
-    handlers = [logging.StreamHandler(sys.stdout)]
-    logging.basicConfig(
-        handlers=handlers,
-        format=(
-            "{asctime:^} | {levelname: ^8} | "
-            "{filename: ^14} {lineno: <4} | {message}"
-        ),
-        style="{",
-        datefmt="%d.%m.%Y %H:%M:%S",
-        level=logging.DEBUG,
-    )
 
 
-def run_application(config):
-    setup_logging()
-    QCoreApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
-    QCoreApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
+class MainGroup(click.Group):
+    """Runs the player unless a command is given.
 
-    app = QApplication(sys.argv)
-    QFontDatabase.addApplicationFont(
-        resource_path("fonts/Roboto/Roboto-Regular.ttf")
-    )
+    The player command is imported on demand, headless commands never
+    load PyQt5.
+    """
+
+    default_command = "play"
+
+    def list_commands(self, ctx):
+        return sorted(super().list_commands(ctx) + [self.default_command])
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name == self.default_command:
+            from folderplay.app import play
+
+            return play
+        return super().get_command(ctx, cmd_name)
+
+    def parse_args(self, ctx, args):
+        if not args or (
+            args[0] not in self.list_commands(ctx)
+            and args[0] not in ctx.help_option_names + ["--version"]
+        ):
+            args = [self.default_command] + args
+        return super().parse_args(ctx, args)
 
-    font = QFont("Roboto", FONT_SIZE)
-    QApplication.setFont(font)
-
-    player = Player(config)
-    player.show()
-    return app.exec_()
-
-
-def validate_player(ctx, param, value):
-    if not value:
-        return value
-    file_info = QFileInfo(value)
-    if file_info and file_info.isExecutable():
-        return file_info.filePath()
-    file_info = QFileInfo(shutil.which(value))
-    if file_info and file_info.isExecutable():
-        return file_info.filePath()
-    if is_windows():
-        from contextlib import suppress
-        from pathlib import Path
-        import winreg
-        import itertools
-
-        filename = Path(value.lower()).stem
-
-        with suppress(WindowsError), winreg.OpenKey(
-            winreg.HKEY_LOCAL_MACHINE,
-            r"SOFTWARE\Microsoft\Windows\CurrentVersion\App Paths",
-        ) as k:
-            for i in itertools.count():
-                subkey = winreg.EnumKey(k, i)
-                if Path(subkey.lower()).stem == filename:
-                    with winreg.OpenKey(k, subkey) as filekey:
-                        val, _ = winreg.QueryValueEx(filekey, None)
-                        file_info = QFileInfo(val)
-                        if file_info and file_info.isExecutable():
-                            return file_info.filePath()
-    raise click.BadParameter("Player must an executable")
-
-
-@click.command(short_help=about.__description__)
+
+@click.group(cls=MainGroup, short_help=about.__description__)
 @click.version_option(about.__version__)
+def main():
+    click.echo(click.style(about.__doc__, fg="blue"))
+
+
+@main.command(short_help="Prewarm the media info cache")
 @click.option(
-    "--player",
-    "-p",
-    "player_path",
-    type=click.Path(exists=False, dir_okay=False),
-    metavar="<path>",
-    help="Host player binary",
-    callback=validate_player,
-)
-@click.option(
-    "--style",
-    "-s",
-    type=click.Choice(Style.names()),
-    metavar="<name>",
-    help="Color style: {}".format(", ".join(Style.names())),
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=os.cpu_count() or 1,
+    metavar="<count>",
+    help="Parallel media info parsers, defaults to the number of CPUs",
 )
-@click.option(
-    "--duration_type",
-    "-d",
-    type=click.Choice(DurationLabel.DisplayMode.names()),
-    metavar="<name>",
-    help="Duration display mode: {}".format(
-        ", ".join(DurationLabel.DisplayMode.names())
-    ),
-)
-@click.option(
-    "--pbar_direction",
-    "-pd",
-    type=click.Choice(BidirectionalProgressBar.Direction.names()),
-    metavar="<name>",
-    help="Progressbar direction: {}".format(
-        ", ".join(BidirectionalProgressBar.Direction.names())
+@click.argument(
+    "workdir",
+    metavar="<directory>",
+    type=click.Path(
+        exists=True, file_okay=False, readable=True, resolve_path=True
     ),
+    default=os.getcwd(),
+    nargs=1,
 )
+def index(workdir, jobs):
+    from folderplay.indexer import index_media
+    from folderplay.utils import setup_logging
+
+    setup_logging(logging.WARNING)
+    click.echo("Indexing {} with {} processes".format(workdir, jobs))
+    stats = index_media(
+        workdir, jobs, report=lambda s: click.echo("  {}".format(s))
+    )
+    click.echo("Done: {}".format(stats))
+
+
+@main.command(short_help="Import watched file names into the database")
 @click.option(
-    "--icons",
-    "-i",
-    type=click.Choice(IconSet.names()),
-    metavar="<name>",
-    help="Icon set: {}".format(", ".join(IconSet.names())),
+    "--strip",
+    is_flag=True,
+    help="Remove the watched prefix from the file names once imported",
 )
 @click.argument(
     "workdir",
@@ -137,16 +86,30 @@ def validate_player(ctx, param, value):
     default=os.getcwd(),
     nargs=1,
 )
-@click.pass_context
-def main(
-    ctx, workdir, player_path, style, icons, duration_type, pbar_direction
-):
-    exit_code = EXIT_CODE_REBOOT
-    while exit_code == EXIT_CODE_REBOOT:
-        config = Config(workdir, ctx.params)
-        exit_code = run_application(config)
-    sys.exit(exit_code)
+def migrate(workdir, strip):
+    from folderplay.utils import setup_logging
+    from folderplay.watchedstate import migrate_watched
+
+    setup_logging(logging.WARNING)
+    click.echo("Importing watched medias under {}".format(workdir))
+    try:
+        imported, renamed, failed = migrate_watched(
+            workdir,
+            strip,
+            report=lambda i, r: click.echo(
+                "  {} imported, {} renamed".format(i, r)
+            ),
+        )
+    except OSError as e:
+        raise click.ClickException(str(e))
+    click.echo(
+        "Done: {} imported, {} renamed, {} failed".format(
+            imported, renamed, failed
+        )
+    )
 
 
 if __name__ == "__main__":
+    # Frozen builds start worker processes through this entry point
+    multiprocessing.freeze_support()
     main(prog_name="folderplay")
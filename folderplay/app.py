@@ -0,0 +1,205 @@
+import os
+import shutil
+import sys
+
+import click
+from PyQt5.QtCore import Qt, QFileInfo, QCoreApplication
+from PyQt5.QtGui import QFontDatabase, QFont
+from PyQt5.QtWidgets import QApplication
+
+from folderplay.config import Config
+from folderplay.constants import FONT_SIZE
+from folderplay.gui.icons import IconSet
+from folderplay.gui.label import DurationLabel
+from folderplay.gui.progressbar import BidirectionalProgressBar
+from folderplay.gui.styles import Style
+from folderplay.readahead import ReadAhead
+from folderplay.utils import resource_path, is_windows, setup_logging
+from folderplay.watchedstate import WatchedState
+from folderplay.watcher import MediaWatcher
+
+
+def run_application(config):
+    # Imported here, a handed off invocation exits without loading it
+    from folderplay.instance import InstanceServer
+    from folderplay.player import Player
+
+    setup_logging()
+    QCoreApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
+    QCoreApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
+
+    app = QApplication(sys.argv)
+    QFontDatabase.addApplicationFont(
+        resource_path("fonts/Roboto/Roboto-Regular.ttf")
+    )
+
+    font = QFont("Roboto", FONT_SIZE)
+    QApplication.setFont(font)
+
+    player = Player(config)
+    player.show()
+
+    server = None
+    if config.single_instance:
+        server = InstanceServer(app)
+        server.received.connect(player.open_workdir)
+        server.listen()
+    exit_code = app.exec_()
+    if server is not None:
+        server.close()
+    return exit_code
+
+
+def validate_player(ctx, param, value):
+    if not value:
+        return value
+    file_info = QFileInfo(value)
+    if file_info and file_info.isExecutable():
+        return file_info.filePath()
+    file_info = QFileInfo(shutil.which(value))
+    if file_info and file_info.isExecutable():
+        return file_info.filePath()
+    if is_windows():
+        from contextlib import suppress
+        from pathlib import Path
+        import winreg
+        import itertools
+
+        filename = Path(value.lower()).stem
+
+        with suppress(WindowsError), winreg.OpenKey(
+            winreg.HKEY_LOCAL_MACHINE,
+            r"SOFTWARE\Microsoft\Windows\CurrentVersion\App Paths",
+        ) as k:
+            for i in itertools.count():
+                subkey = winreg.EnumKey(k, i)
+                if Path(subkey.lower()).stem == filename:
+                    with winreg.OpenKey(k, subkey) as filekey:
+                        val, _ = winreg.QueryValueEx(filekey, None)
+                        file_info = QFileInfo(val)
+                        if file_info and file_info.isExecutable():
+                            return file_info.filePath()
+    raise click.BadParameter("Player must an executable")
+
+
+@click.command(short_help="Run the player (default)")
+@click.option(
+    "--player",
+    "-p",
+    "player_path",
+    type=click.Path(exists=False, dir_okay=False),
+    metavar="<path>",
+    help="Host player binary",
+    callback=validate_player,
+)
+@click.option(
+    "--style",
+    "-s",
+    type=click.Choice(Style.names()),
+    metavar="<name>",
+    help="Color style: {}".format(", ".join(Style.names())),
+)
+@click.option(
+    "--duration_type",
+    "-d",
+    type=click.Choice(DurationLabel.DisplayMode.names()),
+    metavar="<name>",
+    help="Duration display mode: {}".format(
+        ", ".join(DurationLabel.DisplayMode.names())
+    ),
+)
+@click.option(
+    "--pbar_direction",
+    "-pd",
+    type=click.Choice(BidirectionalProgressBar.Direction.names()),
+    metavar="<name>",
+    help="Progressbar direction: {}".format(
+        ", ".join(BidirectionalProgressBar.Direction.names())
+    ),
+)
+@click.option(
+    "--icons",
+    "-i",
+    type=click.Choice(IconSet.names()),
+    metavar="<name>",
+    help="Icon set: {}".format(", ".join(IconSet.names())),
+)
+@click.option(
+    "--watch",
+    "-w",
+    "watch_mode",
+    type=click.Choice(MediaWatcher.Mode.names()),
+    metavar="<name>",
+    help="Filesystem watching: {}".format(", ".join(MediaWatcher.Mode.names())),
+)
+@click.option(
+    "--session",
+    "player_session",
+    is_flag=True,
+    help="Keep one mpv player open and control it over IPC",
+)
+@click.option(
+    "--queue",
+    "-q",
+    "queue_size",
+    type=click.IntRange(min=0),
+    metavar="<count>",
+    help="Unwatched medias queued after the playing one, implies --session",
+)
+@click.option(
+    "--read_ahead",
+    "-ra",
+    type=click.Choice(ReadAhead.Mode.names()),
+    metavar="<name>",
+    help="Read the next media ahead of playback: {}".format(
+        ", ".join(ReadAhead.Mode.names())
+    ),
+)
+@click.option(
+    "--single_instance",
+    "-si",
+    is_flag=True,
+    help="Open the directory in the running window if there is one",
+)
+@click.option(
+    "--watched_state",
+    "-ws",
+    type=click.Choice(WatchedState.Backend.names()),
+    metavar="<name>",
+    help="Where watched flags are kept: {}".format(
+        ", ".join(WatchedState.Backend.names())
+    ),
+)
+@click.argument(
+    "workdir",
+    metavar="<directory>",
+    type=click.Path(
+        exists=True, file_okay=False, readable=True, resolve_path=True
+    ),
+    default=os.getcwd(),
+    nargs=1,
+)
+@click.pass_context
+def play(
+    ctx,
+    workdir,
+    player_path,
+    style,
+    icons,
+    duration_type,
+    pbar_direction,
+    watch_mode,
+    player_session,
+    queue_size,
+    read_ahead,
+    single_instance,
+    watched_state,
+):
+    config = Config(workdir, ctx.params)
+    if config.single_instance:
+        from folderplay.instance import send_to_running
+
+        if send_to_running(workdir, ctx.params):
+            click.echo("Opened {} in the running window".format(workdir))
+            sys.exit(0)
+    sys.exit(run_application(config))
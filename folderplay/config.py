@@ -8,6 +8,9 @@ from folderplay.gui.icons import IconSet
 from folderplay.gui.label import DurationLabel
 from folderplay.gui.progressbar import BidirectionalProgressBar
 from folderplay.gui.styles import Style
+from folderplay.readahead import ReadAhead
+from folderplay.watchedstate import WatchedState
+from folderplay.watcher import MediaWatcher
 
 
 class Param:
@@ -85,3 +88,9 @@ class Config:
     pbar_direction = Param(
         "pbar_direction", BidirectionalProgressBar.Direction.forward.name
     )
+    watch_mode = Param("watch_mode", MediaWatcher.Mode.native.name)
+    player_session = Param("player_session", False)
+    queue_size = Param("queue_size", 0)
+    read_ahead = Param("read_ahead", ReadAhead.Mode.off.name)
+    single_instance = Param("single_instance", False)
+    watched_state = Param("watched_state", WatchedState.Backend.rename.name)
@@ -131,6 +131,8 @@ EXTENSIONS_AUDIO = [
 ]
 
 EXTENSIONS_MEDIA = EXTENSIONS_AUDIO + EXTENSIONS_VIDEO
+# Lookup table for the scanner, checked once per directory entry
+MEDIA_SUFFIXES = frozenset(EXTENSIONS_MEDIA)
 
 LOCAL_PLAYER_MEDIA_ARG = "<media_path>"
 
@@ -139,4 +141,38 @@ NOT_AVAILABLE = "N/A"
 FINISHED = "Finished"
 FONT_SIZE = 12
 MAX_MOVIE_TITLE_LENGTH = 50
-EXIT_CODE_REBOOT = -15123123
+SCAN_BATCH_SIZE = 500
+SCAN_BATCH_INTERVAL = 0.1
+RENAME_PROGRESS_INTERVAL = 0.1
+# Files renamed in parallel, renames are mostly waiting on network shares
+RENAME_WORKERS = 8
+# Seconds between progress lines of `folderplay index`
+INDEX_REPORT_INTERVAL = 2
+# Unwatched medias parsed ahead of the current one
+MEDIA_INFO_PREFETCH = 3
+# Rows around the viewport of the media list whose info is parsed too
+MEDIA_INFO_SCROLL_AHEAD = 10
+# Rows kept in the media info cache and rows written at once
+MEDIA_INFO_CACHE_SIZE = 200000
+MEDIA_INFO_CACHE_BATCH = 100
+# Bytes per second read ahead of playback, the rest is left to the player
+READ_AHEAD_RATE = 8 * 1024 * 1024
+READ_AHEAD_CHUNK = 1024 * 1024
+# Beginning of the next media kept in the page cache, minutes of video
+READ_AHEAD_PAGECACHE_SIZE = 256 * 1024 * 1024
+# Bytes of local copies kept in the read ahead cache
+READ_AHEAD_CACHE_SIZE = 16 * 1024 * 1024 * 1024
+# Prefixed files imported into the watched database per transaction
+WATCHED_STATE_BATCH = 1000
+# Milliseconds
+WATCHER_COALESCE_INTERVAL = 500
+WATCHER_MAX_DELAY = 5000
+WATCHER_POLL_INTERVAL = 10000
+FILTER_DEBOUNCE_INTERVAL = 150
+REGEX_TIME_BUDGET = 2000
+REGEX_POLL_INTERVAL = 20
+VIEWPORT_LOAD_INTERVAL = 50
+SESSION_CONNECT_INTERVAL = 100
+SESSION_CONNECT_TIMEOUT = 5000
+INSTANCE_CONNECT_TIMEOUT = 200
+INSTANCE_REPLY_TIMEOUT = 2000
@@ -0,0 +1,255 @@
+import logging
+import os
+import struct
+from io import BytesIO
+
+logger = logging.getLogger(__name__)
+
+# Headers larger than this are left to libmediainfo
+MAX_HEADER_SIZE = 16 * 2**20
+
+EBML_HEADER = 0x1A45DFA3
+MKV_SEGMENT = 0x18538067
+MKV_CLUSTER = 0x1F43B675
+MKV_INFO = 0x1549A966
+MKV_TIMECODE_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+MKV_TRACKS = 0x1654AE6B
+MKV_TRACK_ENTRY = 0xAE
+MKV_TRACK_TYPE = 0x83
+MKV_TRACK_TYPE_VIDEO = 1
+MKV_VIDEO = 0xE0
+MKV_PIXEL_WIDTH = 0xB0
+MKV_PIXEL_HEIGHT = 0xBA
+
+
+def read_exactly(f, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("Unexpected end of file")
+    return data
+
+
+def mp4_boxes(data: bytes, start: int = 0, end: int = None):
+    """Yields `(type, payload start, payload end)` of the boxes in data."""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise ValueError("Invalid MP4 box {!r}".format(kind))
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def find_mp4_moov(f) -> bytes:
+    """Reads the `moov` box, only box headers are read on the way."""
+    pos = 0
+    while True:
+        f.seek(pos)
+        header = f.read(16)
+        if len(header) < 8:
+            raise ValueError("No moov box")
+        size, kind = struct.unpack_from(">I4s", header)
+        header_size = 8
+        if size == 1:
+            if len(header) < 16:
+                raise ValueError("Truncated MP4 box")
+            size = struct.unpack_from(">Q", header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            if kind != b"moov":
+                raise ValueError("No moov box")
+            return f.read(MAX_HEADER_SIZE)
+        if size < header_size:
+            raise ValueError("Invalid MP4 box {!r}".format(kind))
+        if kind == b"moov":
+            if size > MAX_HEADER_SIZE:
+                raise ValueError("moov box is too large")
+            f.seek(pos + header_size)
+            return read_exactly(f, size - header_size)
+        pos += size
+
+
+def read_mp4(f):
+    moov = find_mp4_moov(f)
+    boxes = list(mp4_boxes(moov))
+    if any(kind == b"mvex" for kind, _, _ in boxes):
+        # Fragmented, the duration is spread over the fragments
+        return None
+    timescale = None
+    for kind, start, end in boxes:
+        if kind == b"mvhd":
+            version = moov[start]
+            offset = start + (20 if version == 1 else 12)
+            timescale = struct.unpack_from(">I", moov, offset)[0]
+        elif kind == b"trak":
+            for sub_kind, sub_start, sub_end in mp4_boxes(moov, start, end):
+                if sub_kind != b"tkhd":
+                    continue
+                if sub_end - sub_start < 84:
+                    raise ValueError("Truncated tkhd box")
+                version = moov[sub_start]
+                if version == 1:
+                    duration = struct.unpack_from(">Q", moov, sub_start + 28)[0]
+                    unknown = 2**64 - 1
+                else:
+                    duration = struct.unpack_from(">I", moov, sub_start + 20)[0]
+                    unknown = 2**32 - 1
+                # 16.16 fixed point, zero for audio tracks
+                width, height = struct.unpack_from(">II", moov, sub_end - 8)
+                width >>= 16
+                height >>= 16
+                if width and height:
+                    if not timescale:
+                        raise ValueError("No mvhd box before tracks")
+                    if duration in (0, unknown):
+                        # Left to libmediainfo, which reads the samples
+                        return None
+                    return duration // timescale, width, height
+    return None
+
+
+def read_ebml_vint(f, keep_marker: bool = False):
+    """Returns the value and the length of a variable size integer."""
+    first = read_exactly(f, 1)[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        length += 1
+        mask >>= 1
+    if length > 8:
+        raise ValueError("Invalid EBML variable size integer")
+    value = first if keep_marker else first & (mask - 1)
+    unknown = value == mask - 1
+    for byte in read_exactly(f, length - 1):
+        value = (value << 8) | byte
+        unknown = unknown and byte == 0xFF
+    if unknown and not keep_marker:
+        return None, length
+    return value, length
+
+
+def read_ebml_element(f):
+    """Returns the id and the payload size (None if unknown) of an element."""
+    element_id, _ = read_ebml_vint(f, keep_marker=True)
+    size, _ = read_ebml_vint(f)
+    return element_id, size
+
+
+def ebml_children(data: bytes):
+    """Yields `(id, payload)` of the elements in data."""
+    f = BytesIO(data)
+    while f.tell() < len(data):
+        element_id, size = read_ebml_element(f)
+        if size is None:
+            raise ValueError("Unknown size inside a master element")
+        yield element_id, read_exactly(f, size)
+
+
+def ebml_uint(data: bytes) -> int:
+    return int.from_bytes(data, "big")
+
+
+def ebml_float(data: bytes) -> float:
+    if len(data) == 4:
+        return struct.unpack(">f", data)[0]
+    if len(data) == 8:
+        return struct.unpack(">d", data)[0]
+    raise ValueError("Invalid EBML float")
+
+
+def read_matroska(f):
+    element_id, size = read_ebml_element(f)
+    if element_id != EBML_HEADER or size is None:
+        raise ValueError("Not an EBML file")
+    f.seek(size, 1)
+    element_id, _ = read_ebml_element(f)
+    if element_id != MKV_SEGMENT:
+        raise ValueError("No Matroska segment")
+
+    info = tracks = None
+    # Info and Tracks precede the clusters, anything else is skipped
+    while info is None or tracks is None:
+        try:
+            element_id, size = read_ebml_element(f)
+        except ValueError:
+            break
+        if element_id == MKV_CLUSTER or size is None:
+            break
+        if element_id in (MKV_INFO, MKV_TRACKS):
+            if size > MAX_HEADER_SIZE:
+                raise ValueError("Matroska header is too large")
+            payload = read_exactly(f, size)
+            if element_id == MKV_INFO:
+                info = payload
+            else:
+                tracks = payload
+        else:
+            f.seek(size, 1)
+    if info is None or tracks is None:
+        return None
+
+    timecode_scale = 1000000
+    duration = None
+    for element_id, payload in ebml_children(info):
+        if element_id == MKV_TIMECODE_SCALE:
+            timecode_scale = ebml_uint(payload)
+        elif element_id == MKV_DURATION:
+            duration = ebml_float(payload)
+
+    for element_id, entry in ebml_children(tracks):
+        if element_id != MKV_TRACK_ENTRY:
+            continue
+        track_type = video = None
+        for child_id, payload in ebml_children(entry):
+            if child_id == MKV_TRACK_TYPE:
+                track_type = ebml_uint(payload)
+            elif child_id == MKV_VIDEO:
+                video = payload
+        if track_type != MKV_TRACK_TYPE_VIDEO or video is None:
+            continue
+        width = height = None
+        for child_id, payload in ebml_children(video):
+            if child_id == MKV_PIXEL_WIDTH:
+                width = ebml_uint(payload)
+            elif child_id == MKV_PIXEL_HEIGHT:
+                height = ebml_uint(payload)
+        if duration is not None:
+            duration = int(duration * timecode_scale // 10**9)
+        return duration, width, height
+    return None
+
+
+READERS = {
+    ".mp4": read_mp4,
+    ".m4v": read_mp4,
+    ".mov": read_mp4,
+    ".mkv": read_matroska,
+    ".webm": read_matroska,
+}
+
+
+def read_container_info(path: str):
+    """ Reads the duration and video resolution from the container header.
+
+        Only MP4 and Matroska are supported, for which a few small reads are
+        enough. Returns `(duration in seconds, width, height)`, or None when
+        the format is not supported, the file has no video track or cannot
+        be read, so the caller can fall back to libmediainfo.
+    """
+    reader = READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        return None
+    try:
+        with open(path, "rb") as f:
+            return reader(f)
+    except (OSError, ValueError, struct.error, IndexError) as e:
+        logger.debug("Unable to read the header of {}: {}".format(path, e))
+        return None
@@ -0,0 +1,71 @@
+class FenwickTree:
+    """ Binary indexed tree over a list of 0/1 flags.
+
+        Setting a flag, counting the set flags before a position and finding
+        the n-th set or unset flag are O(log n).
+    """
+
+    def __init__(self, flags=()):
+        self.flags = bytearray(1 if f else 0 for f in flags)
+        size = len(self.flags)
+        self.tree = [0] * (size + 1)
+        # Linear construction, every node adds itself to its parent
+        for i, flag in enumerate(self.flags, 1):
+            self.tree[i] += flag
+            parent = i + (i & -i)
+            if parent <= size:
+                self.tree[parent] += self.tree[i]
+        self.total = sum(self.flags)
+        self.top = 1 << size.bit_length() if size else 0
+
+    def __len__(self):
+        return len(self.flags)
+
+    def set(self, index: int, flag: bool):
+        flag = 1 if flag else 0
+        delta = flag - self.flags[index]
+        if not delta:
+            return
+        self.flags[index] = flag
+        self.total += delta
+        i = index + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def count(self, end: int) -> int:
+        """Number of set flags before `end`."""
+        total = 0
+        while end > 0:
+            total += self.tree[end]
+            end -= end & -end
+        return total
+
+    def find(self, n: int, flag: bool = True) -> int:
+        """ Index of the n-th (from 0) set flag, or unset when `flag` is
+            False. Returns None when there are not that many.
+        """
+        available = self.total if flag else len(self.flags) - self.total
+        if not 0 <= n < available:
+            return None
+        pos = 0
+        step = self.top
+        while step:
+            nxt = pos + step
+            if nxt < len(self.tree):
+                # Node `nxt` covers the `step` flags after `pos`
+                found = self.tree[nxt] if flag else step - self.tree[nxt]
+                if found <= n:
+                    pos = nxt
+                    n -= found
+            step >>= 1
+        return pos
+
+    def next(self, start: int, flag: bool = True) -> int:
+        """Index of the first matching flag at or after `start`, or None."""
+        before = self.count(start) if flag else start - self.count(start)
+        return self.find(before, flag)
+
+    def last(self, flag: bool = True) -> int:
+        available = self.total if flag else len(self.flags) - self.total
+        return self.find(available - 1, flag) if available else None
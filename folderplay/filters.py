@@ -0,0 +1,142 @@
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+
+class MediaFilter:
+    """ Search, hide-watched and rename settings compiled into one predicate.
+
+        Built once per settings change and applied to every media in a single
+        pass, the regular expressions are never recompiled per media.
+    """
+
+    def __init__(
+        self,
+        text: str = "",
+        regex: bool = False,
+        hide_watched: bool = False,
+        rename: bool = False,
+    ):
+        self.text = text
+        self.regex = regex
+        self.hide_watched = hide_watched
+        self.rename = regex and rename
+
+        pattern = text if regex else re.escape(text)
+        try:
+            self.pattern = re.compile(pattern, re.IGNORECASE)
+        except re.error:
+            # Failed pattern should not hide the whole list of medias
+            self.pattern = None
+        if not text:
+            self.pattern = None
+        if self.pattern is None:
+            self.rename = False
+        # Medias matched by the pattern in the worker, see `apply_matches`
+        self.matches = None
+
+    def accepts(self, media) -> bool:
+        if self.hide_watched and media.watched:
+            return False
+        if self.pattern is not None:
+            return self.pattern.search(media.title) is not None
+        return True
+
+    def renamed_title(self, media):
+        match = self.pattern.search(media.title)
+        if match:
+            return self.match_title(match)
+        return None
+
+    @staticmethod
+    def match_title(match):
+        index = 0
+        if len(match.groups()) > 0:
+            index = 1
+        return match.group(index) or None
+
+    def match_titles(self, titles: list) -> list:
+        """ Matches titles against the search pattern only.
+
+            Returns `(index, renamed title)` pairs of the matching titles, to
+            be passed to `apply_matches`.
+        """
+        matches = []
+        for i, title in enumerate(titles):
+            match = self.pattern.search(title)
+            if match is None:
+                continue
+            matches.append(
+                (i, self.match_title(match) if self.rename else None)
+            )
+        return matches
+
+    def refines(self, other: "MediaFilter") -> bool:
+        """ Whether every media accepted by this filter is accepted by `other`.
+
+            True when a plain search text grows, e.g. while typing, so only
+            the medias matched by `other` have to be tested again.
+        """
+        if self.regex or other.regex:
+            return False
+        if other.hide_watched and not self.hide_watched:
+            return False
+        return other.text.lower() in self.text.lower()
+
+    def apply(self, medias) -> list:
+        """ Updates `hidden` and the renamed title of medias.
+
+            Returns the accepted medias, in the order of `medias`.
+        """
+        visible = []
+        for media in medias:
+            media.hidden = not self.accepts(media)
+            if not media.hidden:
+                visible.append(media)
+            if self.rename:
+                media.title_override = self.renamed_title(media)
+            else:
+                media.title_override = None
+        return visible
+
+    def apply_matches(self, medias: list, matches: list) -> list:
+        """ Same as `apply`, with the pattern results of `match_titles`.
+
+            The matching medias are kept for `update`.
+        """
+        for media in medias:
+            media.hidden = True
+            media.title_override = None
+        self.matches = set()
+        visible = []
+        for i, title in matches:
+            media = medias[i]
+            self.matches.add(media)
+            media.title_override = title
+            if self.hide_watched and media.watched:
+                continue
+            media.hidden = False
+            visible.append(media)
+        return visible
+
+    def update(self, medias):
+        """ Updates `hidden` of medias whose watched flag changed.
+
+            Titles must be the same as when the filter was applied, a regex
+            matched by the worker is not matched again.
+        """
+        for media in medias:
+            if self.matches is not None:
+                matched = media in self.matches
+            else:
+                matched = (
+                    self.pattern is None
+                    or self.pattern.search(media.title) is not None
+                )
+            media.hidden = not matched or (self.hide_watched and media.watched)
+
+    def __repr__(self):
+        return "<MediaFilter {!r} regex={} hide_watched={} rename={}>".format(
+            self.text, self.regex, self.hide_watched, self.rename
+        )
@@ -94,6 +94,15 @@ class BasicViewWidget(QWidget):
         vlayout.addWidget(self.btn_play)
         return vlayout
 
+    def set_icons(self):
+        self.lbl_movie_info_time.setIcon(IconSet.current.clock)
+        self.lbl_movie_info_size.setIcon(IconSet.current.size)
+        self.lbl_movie_info_res.setIcon(IconSet.current.monitor)
+        self.lbl_movie_info_title_icon.setIcon(IconSet.current.movie)
+        self.btn_play.setIcon(IconSet.current.play)
+        self.btn_advanced.setIcon(IconSet.current.settings)
+        self.btn_refresh.setIcon(IconSet.current.refresh)
+
     def setup_play_button(self):
         icon = IconSet.current.play
         self.btn_play.setIcon(icon)
@@ -1,3 +1,4 @@
+import hashlib
 import inspect
 import os
 from abc import ABCMeta, abstractmethod
@@ -5,7 +6,7 @@ from enum import Enum
 from pathlib import Path
 from xml.etree import ElementTree
 
-from PyQt5.QtCore import Qt, QPoint, QRect, QRectF
+from PyQt5.QtCore import Qt, QByteArray, QRectF
 from PyQt5.QtGui import (
     QIcon,
     QColor,
@@ -14,30 +15,69 @@ from PyQt5.QtGui import (
     qRgba,
     QPixmap,
     QPainter,
+    QPixmapCache,
 )
 from PyQt5.QtSvg import QSvgRenderer
 
 import folderplay.utils as utils
 
+# Colored svg contents by (file, color), shared by every icon of a file
+SVG_CACHE = {}
+# Parsed renderers by svg key
+RENDERER_CACHE = {}
+
+
+def svg_key(svg_content: bytes) -> str:
+    return hashlib.sha1(svg_content).hexdigest()
+
 
 class SvgEngine(QIconEngine):
+    """ Paints an svg icon from pixmaps rendered once per size.
+
+        Every list row paints an icon, parsing the svg and rendering it
+        each time is what dominated painting. Renderers are shared by the
+        engines of the same svg and rendered pixmaps are kept in
+        `QPixmapCache`, keyed by the svg, which includes its color, the
+        size and the device pixel ratio. Every mode and state is drawn
+        the same.
+    """
+
     def __init__(self, svg_content):
         super().__init__()
         self.data = svg_content
+        self.key = svg_key(svg_content)
+
+    def renderer(self) -> QSvgRenderer:
+        renderer = RENDERER_CACHE.get(self.key)
+        if renderer is None:
+            renderer = QSvgRenderer(QByteArray(self.data))
+            RENDERER_CACHE[self.key] = renderer
+        return renderer
+
+    def cached_pixmap(self, size, ratio: float) -> QPixmap:
+        key = "svg-{}-{}x{}@{}".format(
+            self.key, size.width(), size.height(), ratio
+        )
+        pix = QPixmapCache.find(key)
+        if pix is not None and not pix.isNull():
+            return pix
+        img = QImage(size * ratio, QImage.Format_ARGB32_Premultiplied)
+        img.fill(qRgba(0, 0, 0, 0))
+        painter = QPainter(img)
+        self.renderer().render(painter, QRectF(img.rect()))
+        painter.end()
+        pix = QPixmap.fromImage(img, Qt.NoFormatConversion)
+        pix.setDevicePixelRatio(ratio)
+        QPixmapCache.insert(key, pix)
+        return pix
 
     def paint(self, painter, rect, mode, state):
         """ paint(self, QPainter, QRect, QIcon.Mode, QIcon.State) """
-        renderer = QSvgRenderer(self.data)
-        renderer.render(painter, QRectF(rect))
+        ratio = painter.device().devicePixelRatioF()
+        painter.drawPixmap(rect, self.cached_pixmap(rect.size(), ratio))
 
     def pixmap(self, size, mode, state):
-        img = QImage(size, QImage.Format_ARGB32)
-        img.fill(qRgba(0, 0, 0, 0))
-        pix = QPixmap.fromImage(img, Qt.NoFormatConversion)
-        painter = QPainter(pix)
-        r = QRect(QPoint(0, 0), size)
-        self.paint(painter, r, mode, state)
-        return pix
+        return self.cached_pixmap(size, 1.0)
 
     def clone(self):
         return SvgEngine(self.data)
@@ -62,7 +102,11 @@ class ColorfulSvgIcon(QIcon, metaclass=QIconMeta):
         # https://stackoverflow.com/a/33540671/8014793
         # https://stackoverflow.com/a/44757951/8014793
 
-        colored_svg_contents = self.parse_svg_color(color)
+        key = (self.path, color.name())
+        colored_svg_contents = SVG_CACHE.get(key)
+        if colored_svg_contents is None:
+            colored_svg_contents = self.parse_svg_color(color)
+            SVG_CACHE[key] = colored_svg_contents
         new_icon = QIcon(SvgEngine(colored_svg_contents))
         self.swap(new_icon)
 
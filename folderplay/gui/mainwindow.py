@@ -3,7 +3,7 @@ import logging
 from PyQt5.QtCore import QSize, Qt, QEventLoop
 from PyQt5.QtWidgets import (
     QMainWindow,
-    QListWidget,
+    QListView,
     QWidget,
     QVBoxLayout,
     QApplication,
@@ -16,6 +16,11 @@ from folderplay.config import Config
 from folderplay.constants import MAX_MOVIE_TITLE_LENGTH
 from folderplay.gui.basicviewwidget import BasicViewWidget
 from folderplay.gui.icons import IconSet, main_icon
+from folderplay.gui.medialist import (
+    MediaListModel,
+    MediaFilterProxyModel,
+    MediaItemDelegate,
+)
 from folderplay.gui.qtmodern import ModernWindow
 from folderplay.gui.settingswidget import SettingsWidget
 from folderplay.gui.styles import Style
@@ -41,7 +46,10 @@ class MainWindow(QMainWindow):
         self.settings_widget.hide()
 
         # Media list
-        self.lst_media = QListWidget(self)
+        self.lst_media = QListView(self)
+        self.media_model = MediaListModel(self)
+        self.media_proxy = MediaFilterProxyModel(self)
+        self.media_proxy.setSourceModel(self.media_model)
         self.setup_files_list()
 
         # Left Pane
@@ -70,14 +78,56 @@ class MainWindow(QMainWindow):
         IconSet.set_current(icons)
 
         style = Style[self.config.style]
+        self.applied_style = style
 
-        if style in (Style.dark, Style.light):
-            self.central_widget = ModernWindow(self)
-        else:
-            self.central_widget = QWidget(self)
+        self.central_widget = self.create_central_widget(style)
         style.apply(QApplication.instance())
         self.setCentralWidget(self.central_widget)
 
+    def create_central_widget(self, style: Style) -> QWidget:
+        if style in (Style.dark, Style.light):
+            return ModernWindow(self)
+        # Undoes the frameless window of a modern style applied before
+        self.setWindowFlags(Qt.Window)
+        self.setAttribute(Qt.WA_TranslucentBackground, False)
+        return QWidget(self)
+
+    def change_style(self, style: Style, iconset: IconSet):
+        """ Applies a style and an icon set to the running window, the
+            widgets and the media list are kept.
+        """
+        logger.info("Changing style to {}, {}".format(style.name, iconset.name))
+        IconSet.set_current(iconset)
+        modern = isinstance(self.central_widget, ModernWindow)
+        if modern != (style in (Style.dark, Style.light)):
+            visible = self.isVisible()
+            central_widget = self.create_central_widget(style)
+            # Moves the panes out of the old central widget before it is
+            # deleted
+            central_widget.setLayout(self.advanced_view_layout())
+            self.setCentralWidget(central_widget)
+            self.central_widget = central_widget
+            if visible:
+                # Changing the window flags hides the window, and with it
+                # the central widget created while it was shown
+                central_widget.show()
+                self.show()
+                self.adjustSize()
+        if style != self.applied_style:
+            style.apply(QApplication.instance())
+            self.applied_style = style
+        else:
+            # Restyling every widget takes most of the time, a new icon set
+            # only needs the icons colored for the style
+            style.apply_icon_color()
+        self.set_icons()
+        self.lst_media.viewport().update()
+        self.reset()
+
+    def set_icons(self):
+        self.basic_view_widget.set_icons()
+        self.settings_widget.set_icons()
+
     def left_pane_layout(self):
         layout = QVBoxLayout()
         layout.addWidget(self.basic_view_widget)
@@ -140,5 +190,9 @@ class MainWindow(QMainWindow):
         size_policy = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.lst_media.setSizePolicy(size_policy)
         self.lst_media.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        # Rows are painted by the delegate, only visible rows cost anything
+        self.lst_media.setUniformItemSizes(True)
+        self.lst_media.setItemDelegate(MediaItemDelegate(self.lst_media))
+        self.lst_media.setModel(self.media_proxy)
         # self.lst_media.setSortingEnabled(True)
         self.lst_media.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -0,0 +1,427 @@
+import bisect
+
+from PyQt5.QtCore import (
+    Qt,
+    QAbstractListModel,
+    QAbstractProxyModel,
+    QModelIndex,
+    QRect,
+    QSize,
+)
+from PyQt5.QtGui import QFont, QFontMetrics, QPalette
+from PyQt5.QtWidgets import (
+    QStyledItemDelegate,
+    QStyle,
+    QStyleOptionViewItem,
+    QApplication,
+)
+
+from folderplay.constants import FONT_SIZE
+from folderplay.fenwick import FenwickTree
+from folderplay.gui.icons import IconSet
+from folderplay.searchindex import TrigramIndex
+
+
+def find_row(medias: list, media):
+    """ Row of `media` in the sorted `medias`, or None.
+
+        Medias of the same directory named "x" and WATCHED_PREFIX + "x"
+        share a sort key, every media of the run of equal keys is checked.
+    """
+    row = bisect.bisect_left(medias, media)
+    while row < len(medias) and medias[row].sort_key == media.sort_key:
+        if medias[row] is media:
+            return row
+        row += 1
+    return None
+
+
+def row_ranges(rows: list) -> list:
+    """`(first, last)` pairs of the contiguous runs of the sorted `rows`."""
+    ranges = []
+    for row in rows:
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1] = (ranges[-1][0], row)
+        else:
+            ranges.append((row, row))
+    return ranges
+
+
+class MediaListModel(QAbstractListModel):
+    MediaRole = Qt.UserRole + 1
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.medias = []
+        self.search_index = TrigramIndex()
+        self.watched_medias = set()
+        # Incremented when medias are added, removed or renamed, watched
+        # flags do not count
+        self.revision = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.medias)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        return self.media_data(self.medias[index.row()], role)
+
+    def media_data(self, media, role):
+        if role == Qt.DisplayRole:
+            return media.get_title()
+        if role == Qt.ToolTipRole:
+            return media.path
+        if role == self.MediaRole:
+            return media
+        return None
+
+    def media(self, row: int):
+        return self.medias[row]
+
+    def row_of(self, media):
+        return find_row(self.medias, media)
+
+    def clear(self):
+        self.beginResetModel()
+        self.medias = []
+        self.search_index.clear()
+        self.watched_medias.clear()
+        self.revision += 1
+        self.endResetModel()
+
+    def add_medias(self, medias: list) -> list:
+        """ Merges medias into the sorted list.
+
+            Medias landing at the same position are inserted with a single
+            `beginInsertRows` call. Returns the rows of the inserted medias.
+        """
+        groups = {}
+        for m in medias:
+            row = bisect.bisect_right(self.medias, m)
+            groups.setdefault(row, []).append(m)
+            self.search_index.add(m)
+            if m.watched:
+                self.watched_medias.add(m)
+        self.revision += 1
+        positions = sorted(groups)
+        # Inserting from the end keeps the remaining positions valid
+        for row in reversed(positions):
+            group = groups[row] = sorted(groups[row])
+            self.beginInsertRows(QModelIndex(), row, row + len(group) - 1)
+            self.medias[row:row] = group
+            self.endInsertRows()
+        rows = []
+        for row in positions:
+            rows.extend(
+                range(row + len(rows), row + len(rows) + len(groups[row]))
+            )
+        return rows
+
+    def remove_rows(self, rows: list):
+        self.revision += 1
+        # Contiguous rows are removed with a single `beginRemoveRows` call,
+        # from the end so the remaining rows stay valid
+        for first, last in reversed(row_ranges(sorted(set(rows)))):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for media in self.medias[first : last + 1]:
+                self.search_index.remove(media)
+                self.watched_medias.discard(media)
+            del self.medias[first : last + 1]
+            self.endRemoveRows()
+
+    def info_changed(self, row: int):
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def media_changed(self, row: int):
+        media = self.medias[row]
+        self.search_index.update(media)
+        self.update_watched(media)
+        self.revision += 1
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def watched_changed(self, medias: list):
+        """Must be called once the watched flags of `medias` changed."""
+        for media in medias:
+            self.update_watched(media)
+            row = self.row_of(media)
+            if row is not None:
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+
+    def update_watched(self, media):
+        if media.watched:
+            self.watched_medias.add(media)
+        else:
+            self.watched_medias.discard(media)
+
+    def watched_count(self) -> int:
+        return len(self.watched_medias)
+
+
+class MediaFilterProxyModel(QAbstractProxyModel):
+    """ Shows the medias that are not hidden.
+
+        Visibility is computed in bulk by `MediaFilter`, the proxy keeps the
+        sorted list of visible medias. `set_visible` replaces it with a single
+        reset, so the cost of a filter change depends on the number of
+        matches rather than on the size of the library. Row changes of the
+        source model are applied one media at a time.
+
+        The visible unwatched and visible watched medias are flagged in two
+        Fenwick trees indexed by source rows, finding the next unwatched or
+        the last watched row is O(log n). Showing or hiding a media updates
+        its flags in O(log n), the trees are rebuilt lazily once source rows
+        are inserted or removed or the visible medias are replaced.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.visible = []
+        self.unwatched_tree = None
+        self.watched_tree = None
+
+    def setSourceModel(self, model):
+        old = self.sourceModel()
+        if old is not None:
+            old.rowsInserted.disconnect(self.source_rows_inserted)
+            old.rowsAboutToBeRemoved.disconnect(self.source_rows_removed)
+            old.dataChanged.disconnect(self.source_data_changed)
+            old.modelReset.disconnect(self.source_reset)
+        super().setSourceModel(model)
+        model.rowsInserted.connect(self.source_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self.source_rows_removed)
+        model.dataChanged.connect(self.source_data_changed)
+        model.modelReset.connect(self.source_reset)
+        self.source_reset()
+
+    def index(self, row, column=0, parent=QModelIndex()):
+        if parent.isValid() or column != 0:
+            return QModelIndex()
+        if not 0 <= row < len(self.visible):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.visible)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        return self.sourceModel().media_data(self.visible[index.row()], role)
+
+    def mapToSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        row = self.sourceModel().row_of(self.visible[index.row()])
+        if row is None:
+            return QModelIndex()
+        return self.sourceModel().index(row)
+
+    def mapFromSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        row = self.row_of(self.sourceModel().media(index.row()))
+        if row is None:
+            return QModelIndex()
+        return self.index(row)
+
+    def row_of(self, media):
+        return find_row(self.visible, media)
+
+    def row_after(self, media) -> int:
+        """Row following `media`, whether it is visible or not."""
+        return bisect.bisect_right(self.visible, media)
+
+    def source_row(self, row: int) -> int:
+        return self.sourceModel().row_of(self.visible[row])
+
+    def proxy_index(self, source_row: int) -> QModelIndex:
+        return self.mapFromSource(self.sourceModel().index(source_row))
+
+    def set_visible(self, medias: list):
+        """Replaces the visible medias, `medias` must be sorted."""
+        if medias == self.visible:
+            # A reset relayouts every row of the view
+            return
+        self.beginResetModel()
+        self.visible = medias
+        self.invalidate_trees()
+        self.endResetModel()
+
+    def invalidate_trees(self):
+        self.unwatched_tree = None
+        self.watched_tree = None
+
+    def build_trees(self):
+        if self.unwatched_tree is not None:
+            return
+        shown = set(self.visible)
+        medias = self.sourceModel().medias
+        self.unwatched_tree = FenwickTree(
+            m in shown and not m.watched for m in medias
+        )
+        self.watched_tree = FenwickTree(
+            m in shown and m.watched for m in medias
+        )
+
+    def set_flags(self, source_row: int, media, shown: bool):
+        if self.unwatched_tree is None:
+            return
+        self.unwatched_tree.set(source_row, shown and not media.watched)
+        self.watched_tree.set(source_row, shown and media.watched)
+
+    def proxy_row(self, source_row):
+        if source_row is None:
+            return None
+        return self.row_of(self.sourceModel().media(source_row))
+
+    def next_unwatched(self, start: int = 0):
+        """Row of the first unwatched media at or after `start`, or None."""
+        if start >= len(self.visible):
+            return None
+        self.build_trees()
+        source_row = self.sourceModel().row_of(self.visible[start])
+        return self.proxy_row(self.unwatched_tree.next(source_row))
+
+    def last_watched(self):
+        self.build_trees()
+        return self.proxy_row(self.watched_tree.last())
+
+    def source_reset(self):
+        self.set_visible([m for m in self.sourceModel().medias if not m.hidden])
+
+    def source_rows_inserted(self, parent, first, last):
+        # Source rows after `first` moved
+        self.invalidate_trees()
+        for media in self.sourceModel().medias[first : last + 1]:
+            if not media.hidden:
+                self.insert_media(media)
+
+    def source_rows_removed(self, parent, first, last):
+        self.invalidate_trees()
+        for media in self.sourceModel().medias[first : last + 1]:
+            self.remove_media(media)
+
+    def source_data_changed(self, top_left, bottom_right, roles=()):
+        medias = self.sourceModel().medias
+        for source_row in range(top_left.row(), bottom_right.row() + 1):
+            media = medias[source_row]
+            self.set_flags(source_row, media, not media.hidden)
+            row = self.row_of(media)
+            if media.hidden:
+                if row is not None:
+                    self.remove_media(media)
+            elif row is None:
+                self.insert_media(media)
+            else:
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+
+    def insert_media(self, media):
+        row = bisect.bisect_left(self.visible, media)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.visible.insert(row, media)
+        self.endInsertRows()
+
+    def remove_media(self, media):
+        row = self.row_of(media)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.visible[row]
+        self.endRemoveRows()
+
+
+class MediaItemDelegate(QStyledItemDelegate):
+    ICON_SIZE = 30
+    MARGIN = 5
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.title_font = QFont("Roboto", FONT_SIZE, QFont.DemiBold)
+        self.info_font = QFont("Roboto", FONT_SIZE - 2)
+        self.title_height = QFontMetrics(self.title_font).height()
+        self.info_height = QFontMetrics(self.info_font).height()
+
+    def sizeHint(self, option, index):
+        height = max(self.ICON_SIZE, self.title_height + self.info_height)
+        return QSize(option.rect.width(), height + self.MARGIN)
+
+    def paint(self, painter, option, index):
+        media = index.data(MediaListModel.MediaRole)
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        # Background and selection only, the contents are drawn below
+        opt.text = ""
+        widget = opt.widget
+        style = widget.style() if widget else QApplication.style()
+        style.drawControl(QStyle.CE_ItemViewItem, opt, painter, widget)
+
+        painter.save()
+        rect = option.rect
+        icon = IconSet.current.check_box_blank
+        if media.is_watched():
+            icon = IconSet.current.check_box
+        icon_rect = QRect(
+            rect.left() + self.MARGIN,
+            rect.top() + (rect.height() - self.ICON_SIZE) // 2,
+            self.ICON_SIZE,
+            self.ICON_SIZE,
+        )
+        icon.paint(painter, icon_rect)
+
+        color_role = QPalette.Text
+        if option.state & QStyle.State_Selected:
+            color_role = QPalette.HighlightedText
+        painter.setPen(option.palette.color(color_role))
+
+        left = icon_rect.right() + self.MARGIN * 2
+        width = rect.right() - left
+        info = media.get_short_info()
+        if info:
+            top = (
+                rect.top()
+                + (rect.height() - self.title_height - self.info_height) // 2
+            )
+            title_rect = QRect(left, top, width, self.title_height)
+            info_rect = QRect(
+                left, top + self.title_height, width, self.info_height
+            )
+            painter.setFont(self.info_font)
+            painter.drawText(
+                info_rect,
+                Qt.AlignVCenter,
+                self.elide(info, self.info_font, width),
+            )
+        else:
+            title_rect = QRect(left, rect.top(), width, rect.height())
+
+        painter.setFont(self.title_font)
+        painter.drawText(
+            title_rect,
+            Qt.AlignVCenter,
+            self.elide(media.get_title(), self.title_font, width),
+        )
+        painter.restore()
+
+    @staticmethod
+    def elide(text: str, font: QFont, width: int) -> str:
+        return QFontMetrics(font).elidedText(text, Qt.ElideRight, width)
@@ -155,6 +155,11 @@ class SettingsWidget(QWidget):
         self.btn_change_player.setToolTip("Change player")
         self.btn_change_player.setIcon(IconSet.current.folder_open)
 
+    def set_icons(self):
+        self.btn_change_player.setIcon(IconSet.current.folder_open)
+        for i, iconset in enumerate(IconSet):
+            self.cmb_icon.setItemIcon(i, iconset.value.play)
+
     def setup_player_open_dialog(self):
         directory = None
         if is_linux():
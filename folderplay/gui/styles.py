@@ -9,12 +9,15 @@ from folderplay.utils import resource_path
 
 
 class AbstractStyle(metaclass=ABCMeta):
+    icon_color = QColor(0, 0, 0)
+
     @abstractmethod
     def apply_style(self, app):
         pass
 
 
 class DarkStyle(AbstractStyle):
+    icon_color = QColor(180, 180, 180)
     _STYLESHEET = resource_path("styles/qtmodern.qss")
 
     def _apply_base_theme(self, app):
@@ -77,10 +80,12 @@ class DarkStyle(AbstractStyle):
         app.setPalette(darkPalette)
         self._apply_base_theme(app)
 
-        IconSet.current.set_color(QColor(180, 180, 180))
+        IconSet.current.set_color(self.icon_color)
 
 
 class LightStyle(DarkStyle):
+    icon_color = QColor(0, 0, 0)
+
     def apply_style(self, app):
         """ Apply Light Theme to the Qt application instance.
 
@@ -129,12 +134,14 @@ class LightStyle(DarkStyle):
         app.setPalette(lightPalette)
 
         self._apply_base_theme(app)
-        IconSet.current.set_color(QColor(0, 0, 0))
+        IconSet.current.set_color(self.icon_color)
 
 
 class FusionStyle(AbstractStyle):
     def apply_style(self, app):
         app.setStyle("Fusion")
+        # Drops the palette of a dark or light style applied before
+        app.setPalette(app.style().standardPalette())
         app.setStyleSheet(
             """
         QGroupBox {
@@ -143,13 +150,19 @@ class FusionStyle(AbstractStyle):
         }
         """
         )
-        IconSet.current.set_color(QColor(0, 0, 0))
+        IconSet.current.set_color(self.icon_color)
 
 
 class NativeStyle(AbstractStyle):
+    # Style Qt picked for the platform, recorded before any other is applied
+    platform_style = None
+
     def apply_style(self, app):
+        if self.platform_style:
+            app.setStyle(self.platform_style)
+        app.setPalette(app.style().standardPalette())
         app.setStyleSheet("")
-        IconSet.current.set_color(QColor(0, 0, 0))
+        IconSet.current.set_color(self.icon_color)
 
 
 @unique
@@ -163,5 +176,10 @@ class Style(Enum):
     def names(cls):
         return [e.name for e in cls]
 
+    def apply_icon_color(self):
+        IconSet.current.set_color(self.value.icon_color)
+
     def apply(self, app):
+        if NativeStyle.platform_style is None:
+            NativeStyle.platform_style = app.style().objectName()
         return self.value.apply_style(app)
@@ -0,0 +1,122 @@
+import logging
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from folderplay.constants import INDEX_REPORT_INTERVAL
+from folderplay.media import MediaInfoCache, read_media_info
+from folderplay.scanindex import ScanIndex
+from folderplay.scanner import walk_media
+from folderplay.utils import normpath
+
+logger = logging.getLogger(__name__)
+
+
+class IndexStats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.files = 0
+        self.cached = 0
+        self.parsed = 0
+        self.failed = 0
+        self.parsed_bytes = 0
+
+    def elapsed(self) -> float:
+        return max(time.monotonic() - self.started, 1e-6)
+
+    def __str__(self):
+        elapsed = self.elapsed()
+        return (
+            "{} files ({} parsed, {} cached, {} failed) in {:.1f}s, "
+            "{:.1f} files/s, {:.1f} MB/s".format(
+                self.files,
+                self.parsed,
+                self.cached,
+                self.failed,
+                elapsed,
+                self.parsed / elapsed,
+                self.parsed_bytes / elapsed / 10**6,
+            )
+        )
+
+
+def parse_media(path: str):
+    """ Runs in a pool process. """
+    # Ctrl-C is handled by the parent, which lets running parses complete
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    return read_media_info(path)
+
+
+def index_media(workdir: str, jobs: int, report=None) -> IndexStats:
+    """ Fills the media info cache for every media under `workdir`.
+
+        Files are parsed by a pool of `jobs` processes, files that are
+        already cached are skipped, so an interrupted run resumes where it
+        stopped. The scan index read by the player is refreshed as well.
+        `report(stats)` is called every few seconds.
+
+        Never imports PyQt5, meant to be run headless.
+    """
+    stats = IndexStats()
+    scan_index = ScanIndex.for_workdir(workdir)
+    scan_index.load()
+    cache = MediaInfoCache.default()
+    scanned = set()
+    # Future -> cache entry of the file being parsed
+    pending = {}
+    last_report = time.monotonic()
+
+    def collect(futures):
+        for future in futures:
+            entry = pending.pop(future)
+            try:
+                info = future.result()
+            except Exception:
+                logger.exception("Unable to parse {}".format(entry[0]))
+                info = None
+            if info is None:
+                stats.failed += 1
+                continue
+            cache.store(entry, info)
+            stats.parsed += 1
+            stats.parsed_bytes += entry[1]
+
+    executor = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        for directory, files in walk_media(workdir, index=scan_index):
+            scanned.add(directory)
+            paths = {}
+            for name in files:
+                path = normpath(os.path.join(directory, name))
+                entry = cache.stat(path)
+                if entry is not None:
+                    paths[path] = entry
+            stats.files += len(files)
+            found = cache.lookup(list(paths.values()))
+            stats.cached += len(found)
+            for path, entry in paths.items():
+                if entry[0] in found:
+                    continue
+                # Keeps every worker busy without queueing the whole tree
+                while len(pending) >= jobs * 4:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending[executor.submit(parse_media, path)] = entry
+
+            now = time.monotonic()
+            if (
+                report is not None
+                and now - last_report >= INDEX_REPORT_INTERVAL
+            ):
+                report(stats)
+                last_report = now
+        scan_index.prune(scanned)
+        collect(list(pending))
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown()
+        scan_index.save()
+        cache.close()
+    return stats
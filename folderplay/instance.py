@@ -0,0 +1,120 @@
+import getpass
+import json
+import logging
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+
+from folderplay import __version__ as about
+from folderplay.constants import (
+    INSTANCE_CONNECT_TIMEOUT,
+    INSTANCE_REPLY_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+ACK = b"ok\n"
+
+
+def server_name() -> str:
+    # Local servers live in a directory shared by every user
+    return "{}-{}".format(about.__title__, getpass.getuser())
+
+
+def send_to_running(workdir: str, params: dict) -> bool:
+    """ Hands `workdir` and the command line parameters off to a running
+        instance. Returns False when there is none.
+    """
+    socket = QLocalSocket()
+    socket.connectToServer(server_name())
+    if not socket.waitForConnected(INSTANCE_CONNECT_TIMEOUT):
+        return False
+    message = {"workdir": workdir, "params": params}
+    socket.write(json.dumps(message).encode("utf-8") + b"\n")
+    socket.waitForBytesWritten(INSTANCE_REPLY_TIMEOUT)
+    reply = b""
+    # The running instance answers once the message is handled
+    while not reply.endswith(b"\n") and socket.waitForReadyRead(
+        INSTANCE_REPLY_TIMEOUT
+    ):
+        reply += bytes(socket.readAll())
+    socket.disconnectFromServer()
+    return reply == ACK
+
+
+class InstanceServer(QObject):
+    """ Accepts the directories opened by later instances.
+
+        A second `folderplay` started with `--single_instance` connects to
+        the server of the running window, sends its directory and command
+        line parameters and exits, the window opens the directory instead
+        of a new interpreter starting over.
+    """
+
+    # Directory, command line parameters
+    received = pyqtSignal(str, dict)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self.accept)
+        self.buffers = {}
+
+    def listen(self) -> bool:
+        name = server_name()
+        if self.server.listen(name):
+            logger.info("Listening for other instances on {}".format(name))
+            return True
+        if self.server.serverError() != QLocalSocket.AddressInUseError:
+            logger.error(
+                "Unable to listen on {}: {}".format(
+                    name, self.server.errorString()
+                )
+            )
+            return False
+        # Left behind by an instance that crashed
+        QLocalServer.removeServer(name)
+        if not self.server.listen(name):
+            logger.error(
+                "Unable to listen on {}: {}".format(
+                    name, self.server.errorString()
+                )
+            )
+            return False
+        return True
+
+    def accept(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self.buffers[socket] = b""
+            socket.readyRead.connect(self.read_message)
+            socket.disconnected.connect(self.drop)
+
+    def read_message(self):
+        socket = self.sender()
+        data = self.buffers.get(socket, b"") + bytes(socket.readAll())
+        if not data.endswith(b"\n"):
+            self.buffers[socket] = data
+            return
+        self.buffers[socket] = b""
+        try:
+            message = json.loads(data.decode("utf-8"))
+            workdir = message["workdir"]
+            params = message["params"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Invalid instance message: {!r}".format(data))
+            socket.disconnectFromServer()
+            return
+        logger.info("Another instance opened {}".format(workdir))
+        self.received.emit(workdir, params)
+        socket.write(ACK)
+        socket.flush()
+
+    def drop(self):
+        socket = self.sender()
+        self.buffers.pop(socket, None)
+        socket.deleteLater()
+
+    def close(self):
+        self.server.close()
@@ -2,14 +2,13 @@ import logging
 import os
 import shlex
 import shutil
-import subprocess
 from pathlib import Path
 
-from PyQt5.QtCore import QThread
+from PyQt5.QtCore import QObject, QProcess, pyqtSignal
 from PyQt5.QtWidgets import QMessageBox
 
 from folderplay.constants import LOCAL_PLAYER_MEDIA_ARG
-from folderplay.media import MediaItem
+from folderplay.media import MediaRecord
 from folderplay.utils import (
     get_registry_value,
     is_linux,
@@ -22,16 +21,34 @@ from folderplay.utils import (
 logger = logging.getLogger(__name__)
 
 
-class LocalPlayer(QThread):
+class LocalPlayer(QObject):
+    """ Plays a media in a new process of the host player.
+
+        The process is watched by the event loop, the window stays usable
+        while the media plays. Starting another media replaces the one
+        playing, the replaced media is not reported as finished.
+    """
+
+    # Media that started playing
+    started = pyqtSignal(object)
+    # Media whose player exited by itself, whether the player exited
+    # normally with a zero exit code
+    finished = pyqtSignal(object, bool)
+
     def __init__(self, path: Path = None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.player_path = path
         self.args = None
         self.media = None
+        # Path opened by the player, a local copy of the media may be used
+        self.media_path = None
+        self.process = None
+        # Media of `process`, `media` may be set for the next start
+        self.playing = None
 
     def command(self):
         command = [str(self.player_path)]
-        media_path = win_short_path(self.media.path)
+        media_path = win_short_path(self.media_path)
         args = self.args
         if args:
             if LOCAL_PLAYER_MEDIA_ARG in args:
@@ -43,16 +60,69 @@ class LocalPlayer(QThread):
         logger.info("Player command line: {}".format(command))
         return command
 
-    def set_media(self, media: MediaItem):
+    def set_media(self, media: MediaRecord, path: str = None):
         logger.info("Setting media: {}".format(media))
         self.media = media
+        self.media_path = path or media.path
 
     def set_player(self, path: str):
         logger.info("Setting player: {}".format(path))
         self.player_path = Path(path)
 
-    def run(self):
-        subprocess.run(self.command())
+    def is_playing(self) -> bool:
+        return self.process is not None
+
+    def start(self):
+        if self.is_playing():
+            logger.info("Replacing {}".format(self.playing))
+            self.stop()
+        command = self.command()
+        process = QProcess(self)
+        process.finished.connect(self.process_finished)
+        process.errorOccurred.connect(self.process_error)
+        self.process = process
+        self.playing = self.media
+        process.start(command[0], command[1:])
+        self.started.emit(self.media)
+
+    def process_finished(self, exit_code: int, exit_status):
+        process = self.sender()
+        process.deleteLater()
+        if process is not self.process:
+            # Replaced or stopped
+            return
+        media, self.process, self.playing = self.playing, None, None
+        success = exit_status == QProcess.NormalExit and exit_code == 0
+        if success:
+            logger.info("Player exited: {}".format(media))
+        else:
+            if exit_status == QProcess.CrashExit:
+                logger.error("Player crashed: {}".format(media))
+            else:
+                logger.error(
+                    "Player exited with code {}: {}".format(exit_code, media)
+                )
+        self.finished.emit(media, success)
+
+    def process_error(self, error):
+        process = self.sender()
+        if error != QProcess.FailedToStart:
+            return
+        # `finished` is not emitted for a process that never started
+        logger.error("Unable to start the player: {}".format(process.program()))
+        process.deleteLater()
+        if process is self.process:
+            media, self.process, self.playing = self.playing, None, None
+            self.finished.emit(media, False)
+
+    def stop(self):
+        process, self.process, self.playing = self.process, None, None
+        if process is None:
+            return
+        process.terminate()
+        if not process.waitForFinished(1000):
+            process.kill()
+            process.waitForFinished(1000)
 
     def _darwin_players(self):
         players = [
@@ -1,45 +1,248 @@
 import datetime
 import logging
+import os
+import sqlite3
+import sys
+import time
 from pathlib import Path
 
 from pymediainfo import MediaInfo
 
-from folderplay.constants import WATCHED_PREFIX
-from folderplay.gui.icons import IconSet
-from folderplay.gui.listwidget import ListWidgetItem
-from folderplay.utils import format_size, format_duration, win_short_path
+from folderplay.containers import read_container_info
+from folderplay.constants import (
+    WATCHED_PREFIX,
+    MEDIA_INFO_CACHE_SIZE,
+    MEDIA_INFO_CACHE_BATCH,
+)
+from folderplay.utils import (
+    format_size,
+    format_duration,
+    win_short_path,
+    cache_dir,
+)
 
 logger = logging.getLogger(__name__)
 
 
-class MediaItem(ListWidgetItem):
-    def __init__(self, path: Path, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+def read_media_info(path: str):
+    """ Parses a media file, may take a while.
 
+        MP4 and Matroska headers are read directly, anything else, or a file
+        the header readers cannot handle, is parsed with libmediainfo.
+        Returns a `(size, duration, width, height)` tuple, or None when the
+        file cannot be parsed.
+    """
+    info = read_container_info(path)
+    if info is not None:
+        try:
+            return (os.path.getsize(path),) + info
+        except OSError:
+            return None
+    try:
+        media_info = MediaInfo.parse(win_short_path(path))
+        size = duration = width = height = None
+        for track in media_info.tracks:
+            if track.track_type == "Video":
+                # Missing from streams without an index
+                if track.duration is not None:
+                    duration = int(float(track.duration)) // 1000
+                width = track.width
+                height = track.height
+            elif track.track_type == "General":
+                size = track.file_size
+    except Exception as e:
+        logger.exception(e)
+        return None
+    return size, duration, width, height
+
+
+def unwatched_path(path: str) -> str:
+    directory, name = os.path.split(path)
+    if name.startswith(WATCHED_PREFIX):
+        return os.path.join(directory, name[len(WATCHED_PREFIX) :])
+    return path
+
+
+class MediaInfoCache:
+    """ On-disk cache of `read_media_info` results.
+
+        Rows are keyed by the path without the watched prefix, so toggling
+        the watched status keeps them, and are only used while the size and
+        mtime of the file stay the same. Stores and last use times are
+        buffered and written in batches. Once the cache holds more than
+        `max_size` rows the least recently used ones are evicted.
+
+        Not thread safe, meant to be used by a single worker thread.
+    """
+
+    VERSION = 1
+    # SQLite limits the number of parameters of a statement
+    LOOKUP_CHUNK = 500
+
+    def __init__(self, path: Path, max_size: int = MEDIA_INFO_CACHE_SIZE):
         self.path = path
-        self._title_override = None
-        self.icon_unwatched = IconSet.current.check_box_blank
-        self.icon_watched = IconSet.current.check_box
+        self.max_size = max_size
+        self.conn = None
+        self.disabled = False
+        self.pending = {}
+        self.used = {}
+
+    @classmethod
+    def default(cls) -> "MediaInfoCache":
+        return cls(cache_dir() / "mediainfo.sqlite3")
+
+    def open(self) -> bool:
+        if self.conn is not None or self.disabled:
+            return not self.disabled
+        try:
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.VERSION:
+                conn.execute("DROP TABLE IF EXISTS media_info")
+                conn.execute(
+                    "CREATE TABLE media_info ("
+                    "key TEXT PRIMARY KEY, file_size INTEGER, "
+                    "mtime_ns INTEGER, size INTEGER, duration INTEGER, "
+                    "width INTEGER, height INTEGER, last_used INTEGER)"
+                )
+                conn.execute(
+                    "CREATE INDEX media_info_last_used "
+                    "ON media_info (last_used)"
+                )
+                conn.execute("PRAGMA user_version = {}".format(self.VERSION))
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(
+                "Media info cache {} is unavailable: {}".format(self.path, e)
+            )
+            self.disabled = True
+            return False
+        self.conn = conn
+        return True
+
+    @staticmethod
+    def stat(path: str):
+        """Returns the `(key, size, mtime)` entry of a file or None."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return unwatched_path(path), st.st_size, st.st_mtime_ns
+
+    def lookup(self, entries: list) -> dict:
+        """Maps the keys of up to date `entries` to their media info."""
+        found = {}
+        if not entries or not self.open():
+            return found
+        stats = {key: (size, mtime_ns) for key, size, mtime_ns in entries}
+        keys = list(stats)
+        now = int(time.time())
+        try:
+            for i in range(0, len(keys), self.LOOKUP_CHUNK):
+                chunk = keys[i : i + self.LOOKUP_CHUNK]
+                rows = self.conn.execute(
+                    "SELECT key, file_size, mtime_ns, size, duration, width, "
+                    "height FROM media_info WHERE key IN ({})".format(
+                        ",".join("?" * len(chunk))
+                    ),
+                    chunk,
+                )
+                for key, file_size, mtime_ns, *info in rows:
+                    if stats[key] == (file_size, mtime_ns):
+                        found[key] = tuple(info)
+                        self.used[key] = now
+        except sqlite3.Error:
+            logger.exception("Unable to read media info cache")
+        return found
+
+    def store(self, entry: tuple, info: tuple):
+        key, size, mtime_ns = entry
+        self.pending[key] = (key, size, mtime_ns) + tuple(info)
+        self.used.pop(key, None)
+        if len(self.pending) >= MEDIA_INFO_CACHE_BATCH:
+            self.flush()
+
+    def flush(self):
+        if not (self.pending or self.used) or not self.open():
+            return
+        now = int(time.time())
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO media_info VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, {})".format(now),
+                    self.pending.values(),
+                )
+                self.conn.executemany(
+                    "UPDATE media_info SET last_used = ? WHERE key = ?",
+                    ((t, key) for key, t in self.used.items()),
+                )
+                self.evict()
+        except sqlite3.Error:
+            logger.exception("Unable to write media info cache")
+        self.pending = {}
+        self.used = {}
+
+    def evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM media_info").fetchone()
+        excess = count[0] - self.max_size
+        if excess <= 0:
+            return
+        # Make room for a few more batches at once
+        excess += self.max_size // 10
+        logger.info("Evicting {} media info cache rows".format(excess))
+        self.conn.execute(
+            "DELETE FROM media_info WHERE key IN (SELECT key FROM media_info "
+            "ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+
+    def close(self):
+        self.flush()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class MediaRecord:
+    """ Media file entry.
+
+        Title, watched flag and sort key are derived from the file name once,
+        when the path is set, so sorting and filtering never parse paths.
+    """
+
+    __slots__ = (
+        "path",
+        "title",
+        "sort_key",
+        "watched",
+        "hidden",
+        "title_override",
+        "size",
+        "duration",
+        "width",
+        "height",
+        "info_loaded",
+    )
+
+    def __init__(self, path: str):
+        self.hidden = False
+        self.title_override = None
         self.size = None
         self.duration = None
         self.width = None
         self.height = None
-        # self.parse_media_info()
-        self.setup_info()
+        self.info_loaded = False
+        self.set_path(path)
 
     def parse_media_info(self):
-        try:
-            media_info = MediaInfo.parse(win_short_path(self.path))
-        except Exception as e:
-            logger.exception(e)
-            return
-        for track in media_info.tracks:
-            if track.track_type == "Video":
-                self.duration = int(float(track.duration)) // 1000
-                self.width = track.width
-                self.height = track.height
-            elif track.track_type == "General":
-                self.size = track.file_size
+        self.set_media_info(read_media_info(self.path))
+
+    def set_media_info(self, info: tuple):
+        """Sets the `(size, duration, width, height)` of `read_media_info`."""
+        self.info_loaded = True
+        if info is not None:
+            self.size, self.duration, self.width, self.height = info
 
     def get_short_info(self):
         res = []
@@ -57,59 +260,56 @@ class MediaItem(ListWidgetItem):
             res.append("{}x{}".format(self.width, self.height))
         return ", ".join(res)
 
-    def setup_info(self):
-        self.title.setText(self.get_title())
-        icon = self.icon_unwatched
-        if self.is_watched():
-            icon = self.icon_watched
-        self.icon.setPixmap(icon.pixmap(30, 30))
+    def is_watched(self) -> bool:
+        return self.watched
 
-    def is_watched(self):
-        return self.path.name.startswith(WATCHED_PREFIX)
+    def watched_path(self, watched: bool) -> str:
+        """Path of the file when renamed to the given watched status."""
+        name = WATCHED_PREFIX + self.title if watched else self.title
+        return os.path.join(os.path.dirname(self.path), name)
 
     def toggle_watched(self):
-        if self.is_watched():
-            new_path = self.path.with_name(
-                self.path.name[len(WATCHED_PREFIX):]
-            )
-        else:
-            new_path = self.path.with_name(WATCHED_PREFIX + self.path.name)
-
-        if new_path.exists():
+        new_path = self.watched_path(not self.watched)
+        if os.path.exists(new_path):
             logger.error("Cannot rename, file already exists %s", new_path)
             return
         try:
-            self.path.rename(new_path)
+            os.rename(self.path, new_path)
         except Exception:
             logger.exception("Error while renaming %s", self.path)
         else:
-            self.path = new_path
-            self.setup_info()
+            self.set_path(new_path)
+
+    def set_path(self, path: str):
+        self.path = path
+        directory, name = os.path.split(path)
+        self.watched = name.startswith(WATCHED_PREFIX)
+        if self.watched:
+            name = name[len(WATCHED_PREFIX) :]
+        self.title = name
+        # Unaffected by watched renames, so "x" and WATCHED_PREFIX + "x" of
+        # the same directory share it. The directory string is shared by all
+        # medias of the directory
+        self.sort_key = (name, sys.intern(directory))
 
     def set_watched(self):
-        if not self.is_watched():
+        if not self.watched:
             self.toggle_watched()
 
     def set_unwatched(self):
-        if self.is_watched():
+        if self.watched:
             self.toggle_watched()
 
     def get_title(self) -> str:
-        if self._title_override:
-            return self._title_override
-        title = self.path.name
-        if self.is_watched():
-            return title[len(WATCHED_PREFIX):]
-        return title
+        return self.title_override or self.title
 
     def set_title(self, title: str):
-        self._title_override = title
-        self.title.setText(self.get_title())
+        self.title_override = title
 
     def __lt__(self, other):
-        return self.get_title().__lt__(other.get_title())
+        return self.sort_key < other.sort_key
 
     def __repr__(self):
-        return '<MediaItem "{}" ({})>'.format(
-            self.get_title(), "watched" and self.is_watched() or "unwatched"
+        return '<MediaRecord "{}" ({})>'.format(
+            self.get_title(), "watched" if self.watched else "unwatched"
         )
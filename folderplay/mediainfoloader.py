@@ -0,0 +1,128 @@
+import logging
+import threading
+from collections import deque
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from folderplay.media import MediaInfoCache, read_media_info
+
+logger = logging.getLogger(__name__)
+
+
+class MediaInfoLoader(QThread):
+    """ Parses media info in the background.
+
+        libmediainfo may take seconds on a slow network share, so medias are
+        parsed one at a time. Medias passed to `request` come first, then
+        the rows shown by the list passed to `request_visible`. Each call
+        replaces its queue, which reprioritizes the medias that are still
+        wanted and drops the others. A parse in progress always completes.
+
+        Results are kept in a `MediaInfoCache`. Batches passed to `preload`
+        are looked up in the cache in bulk whenever no media waits for
+        parsing.
+    """
+
+    # Media, `(size, duration, width, height)` tuple or None
+    loaded = pyqtSignal(object, object)
+    # List of (media, info tuple) pairs found in the cache
+    cached = pyqtSignal(list)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache = MediaInfoCache.default()
+        self.queue = deque()
+        self.visible = deque()
+        self.preloads = deque()
+        self.lock = threading.Lock()
+        self.parsing = None
+        self.finished.connect(self.restart)
+
+    def request(self, medias: list):
+        """Replaces the queue with `medias`, in order of priority."""
+        with self.lock:
+            self.queue = deque(
+                m for m in medias if not m.info_loaded and m is not self.parsing
+            )
+        self.restart()
+
+    def request_visible(self, medias: list):
+        """Replaces the queue of the rows shown by the list."""
+        with self.lock:
+            self.visible = deque(
+                m for m in medias if not m.info_loaded and m is not self.parsing
+            )
+        self.restart()
+
+    def preload(self, medias: list):
+        with self.lock:
+            self.preloads.append(medias)
+        self.restart()
+
+    def clear(self):
+        with self.lock:
+            self.queue.clear()
+            self.visible.clear()
+            self.preloads.clear()
+
+    def restart(self):
+        # Requests made while the thread was exiting are picked up here
+        if (
+            self.queue or self.visible or self.preloads
+        ) and not self.isRunning():
+            self.start()
+
+    def stop(self):
+        self.clear()
+        self.requestInterruption()
+        self.wait()
+        self.cache.close()
+
+    def run(self):
+        while not self.isInterruptionRequested():
+            with self.lock:
+                media = batch = None
+                if self.queue:
+                    media = self.parsing = self.queue.popleft()
+                elif self.visible:
+                    media = self.parsing = self.visible.popleft()
+                elif self.preloads:
+                    batch = self.preloads.popleft()
+                else:
+                    break
+            if media is not None:
+                self.parse(media)
+                with self.lock:
+                    self.parsing = None
+            else:
+                self.load_cached(batch)
+        # Idle, nothing is worth buffering anymore
+        self.cache.flush()
+
+    def parse(self, media):
+        if media.info_loaded:
+            return
+        entry = self.cache.stat(media.path)
+        if entry is not None:
+            info = self.cache.lookup([entry]).get(entry[0])
+            if info is not None:
+                self.loaded.emit(media, info)
+                return
+        logger.info("Parsing media info of {}".format(media.path))
+        info = read_media_info(media.path)
+        if info is not None and entry is not None:
+            self.cache.store(entry, info)
+        self.loaded.emit(media, info)
+
+    def load_cached(self, medias: list):
+        entries = {}
+        for media in medias:
+            if not media.info_loaded:
+                entry = self.cache.stat(media.path)
+                if entry is not None:
+                    entries[entry[0]] = (media, entry)
+        found = self.cache.lookup([entry for _, entry in entries.values()])
+        if found:
+            self.cached.emit(
+                [(entries[key][0], info) for key, info in found.items()]
+            )
@@ -0,0 +1,73 @@
+import logging
+import os
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from folderplay.constants import SCAN_BATCH_SIZE, SCAN_BATCH_INTERVAL
+from folderplay.scanindex import ScanIndex
+from folderplay.scanner import walk_media
+from folderplay.utils import normpath
+
+logger = logging.getLogger(__name__)
+
+
+class MediaScanner(QThread):
+    # List of media paths found since the previous batch
+    batch_found = pyqtSignal(list)
+    # Directories scanned, media files found
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.workdir = None
+        self.index = None
+
+    def set_workdir(self, workdir: str):
+        logger.info("Setting scan directory: {}".format(workdir))
+        self.workdir = workdir
+
+    def cancel(self):
+        logger.info("Cancelling media scan")
+        self.requestInterruption()
+
+    def is_cancelled(self) -> bool:
+        return self.isInterruptionRequested()
+
+    def run(self):
+        started = time.monotonic()
+        # Flush the first non-empty batch right away
+        last_flush = 0
+        batch = []
+        dirs_scanned = 0
+        media_found = 0
+        scanned = set()
+        self.index = index = ScanIndex.for_workdir(self.workdir)
+        index.load()
+        for directory, files in walk_media(
+            self.workdir, self.is_cancelled, index
+        ):
+            scanned.add(directory)
+            dirs_scanned += 1
+            media_found += len(files)
+            batch.extend(normpath(os.path.join(directory, f)) for f in files)
+            now = time.monotonic()
+            if len(batch) >= SCAN_BATCH_SIZE or (
+                batch and now - last_flush >= SCAN_BATCH_INTERVAL
+            ):
+                self.batch_found.emit(batch)
+                self.progress.emit(dirs_scanned, media_found)
+                batch = []
+                last_flush = now
+        if batch:
+            self.batch_found.emit(batch)
+        self.progress.emit(dirs_scanned, media_found)
+        # A cancelled scan did not visit every directory
+        if not self.is_cancelled():
+            index.prune(scanned)
+        index.save()
+        logger.info(
+            "Scanned {} directories, {} medias found in {:.2f}s".format(
+                dirs_scanned, media_found, time.monotonic() - started
+            )
+        )
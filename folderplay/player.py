@@ -1,30 +1,50 @@
 import logging
-import re
-from pathlib import Path
+import os
+from itertools import chain
 
 import click
-from PyQt5.QtCore import QFileInfo
+from PyQt5.QtCore import (
+    QFileInfo,
+    QItemSelection,
+    QItemSelectionModel,
+    QPoint,
+    QTimer,
+)
 from PyQt5.QtWidgets import (
-    QListWidgetItem,
     QMenu,
     QDialog,
     QMessageBox,
     QAction,
     QApplication,
     QAbstractItemView,
+    QToolTip,
 )
 
+from folderplay.config import Config
 from folderplay.constants import (
-    EXTENSIONS_MEDIA,
     NOT_AVAILABLE,
     FINISHED,
-    EXIT_CODE_REBOOT,
+    FILTER_DEBOUNCE_INTERVAL,
+    MEDIA_INFO_PREFETCH,
+    MEDIA_INFO_SCROLL_AHEAD,
+    VIEWPORT_LOAD_INTERVAL,
 )
+from folderplay.filters import MediaFilter
 from folderplay.gui.icons import IconSet
 from folderplay.gui.mainwindow import MainWindow
+from folderplay.gui.medialist import row_ranges
+from folderplay.gui.styles import Style
 from folderplay.localplayer import LocalPlayer
-from folderplay.media import MediaItem
-from folderplay.utils import message_box, normpath, format_size, win_short_path
+from folderplay.media import MediaRecord
+from folderplay.mediainfoloader import MediaInfoLoader
+from folderplay.mediascanner import MediaScanner
+from folderplay.playersession import MpvSession
+from folderplay.readahead import ReadAhead
+from folderplay.regexmatcher import RegexMatcher
+from folderplay.renamer import BatchRenamer
+from folderplay.utils import message_box, format_size, win_short_path
+from folderplay.watchedstate import WatchedState
+from folderplay.watcher import MediaWatcher
 
 logger = logging.getLogger(__name__)
 
@@ -32,12 +52,78 @@ logger = logging.getLogger(__name__)
 class Player(MainWindow):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.local_player = LocalPlayer()
+        self.local_player = LocalPlayer(parent=self)
 
         self.local_player.started.connect(self.playback_started)
         self.local_player.finished.connect(self.playback_finished)
 
-        self.filters = [self.hide_regex_not_match, self.hide_watched]
+        self.session = MpvSession(self)
+        # Queue mode needs the session to learn when each media ends
+        self.session_enabled = (
+            self.config.player_session or self.config.queue_size > 0
+        )
+        self.session.media_finished.connect(self.session_media_finished)
+        self.session.failed.connect(self.session_failed)
+
+        self.read_ahead = ReadAhead.create(self.config.read_ahead, self)
+        self.session.path_of = self.read_ahead.path
+
+        self.scanner = MediaScanner(self)
+        self.scanner.batch_found.connect(self.add_media_batch)
+        self.scanner.progress.connect(self.scan_progress)
+        self.scanner.finished.connect(self.scan_finished)
+
+        self.watcher = MediaWatcher(self)
+        self.watcher.set_mode(self.config.watch_mode)
+        self.watcher.changed.connect(self.media_changed)
+
+        self.watched_state = WatchedState.create(
+            self.config.watched_state, self.config.workdir
+        )
+        self.renamer = BatchRenamer(self)
+        self.renamer.progress.connect(self.rename_progress)
+        self.renamer.done.connect(self.renames_done)
+
+        self.info_loader = MediaInfoLoader(self)
+        self.info_loader.loaded.connect(self.media_info_loaded)
+        self.info_loader.cached.connect(self.media_info_cached)
+        self.current_media = None
+
+        # Rows shown by the list are requested once scrolling settles
+        self.viewport_timer = QTimer(self)
+        self.viewport_timer.setSingleShot(True)
+        self.viewport_timer.setInterval(VIEWPORT_LOAD_INTERVAL)
+        self.viewport_timer.timeout.connect(self.load_visible_info)
+        self.scroll_value = 0
+        self.scrolling_up = False
+        scroll_bar = self.lst_media.verticalScrollBar()
+        scroll_bar.valueChanged.connect(self.list_scrolled)
+        scroll_bar.rangeChanged.connect(self.viewport_timer.start)
+        self.media_proxy.modelReset.connect(self.viewport_timer.start)
+        self.media_proxy.rowsInserted.connect(self.viewport_timer.start)
+        self.media_proxy.rowsRemoved.connect(self.viewport_timer.start)
+
+        self.media_filter = MediaFilter()
+        # Typing is debounced, the list is filtered once the user pauses
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(FILTER_DEBOUNCE_INTERVAL)
+        self.filter_timer.timeout.connect(self.search_media)
+
+        self.regex_matcher = RegexMatcher(self)
+        self.regex_matcher.matched.connect(self.regex_matched)
+        self.regex_matcher.failed.connect(self.regex_failed)
+        # Spawning takes a while, better before the first query
+        self.regex_matcher.start()
+        self.regex_revision = 0
+
+        # Bursts of changes refresh the current media, the counters and the
+        # selection once, when control returns to the event loop
+        self.update_timer = QTimer(self)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.setInterval(0)
+        self.update_timer.timeout.connect(self.update_views)
+        self.highlight_pending = False
 
         self.basic_view_widget.btn_play.pressed.connect(
             self.play_button_pressed
@@ -46,14 +132,18 @@ class Player(MainWindow):
             self.select_new_player
         )
         self.settings_widget.chk_hide_watched.stateChanged.connect(
-            self.filter_media
+            self.filter_settings_changed
+        )
+        self.settings_widget.chk_regex.stateChanged.connect(
+            self.filter_settings_changed
+        )
+        self.settings_widget.chk_rename.stateChanged.connect(
+            self.filter_settings_changed
         )
-        self.settings_widget.chk_regex.stateChanged.connect(self.filter_media)
-        self.settings_widget.chk_rename.stateChanged.connect(self.filter_media)
         self.settings_widget.txt_search_box.textEdited.connect(
-            self.filter_media
+            self.filter_timer.start
         )
-        self.basic_view_widget.btn_refresh.pressed.connect(self.load_media)
+        self.basic_view_widget.btn_refresh.pressed.connect(self.refresh_media)
         self.lst_media.customContextMenuRequested.connect(
             self.context_menu_media_list
         )
@@ -65,11 +155,11 @@ class Player(MainWindow):
         self.setup_actions()
         self.load_media()
         self.read_settings()
-        self.settings_widget.cmb_style.currentTextChanged.connect(
-            self.restart_application
+        self.settings_widget.cmb_style.currentIndexChanged.connect(
+            self.style_selected
         )
-        self.settings_widget.cmb_icon.currentTextChanged.connect(
-            self.restart_application
+        self.settings_widget.cmb_icon.currentIndexChanged.connect(
+            self.style_selected
         )
 
     def setup_actions(self):
@@ -123,7 +213,7 @@ class Player(MainWindow):
 
         # Refresh
         act_refresh = QAction(IconSet.current.refresh, "Refresh", self)
-        act_refresh.triggered.connect(self.load_media)
+        act_refresh.triggered.connect(self.refresh_media)
         act_refresh.setShortcut("R")
         act_refresh.setShortcutVisibleInContextMenu(True)
 
@@ -144,6 +234,18 @@ class Player(MainWindow):
         act_mark_watched_next.setShortcut("Ctrl+Shift+Z")
         act_mark_watched_next.setShortcutVisibleInContextMenu(True)
 
+        # Icons set again when the icon set changes
+        self.action_icons = [
+            (act_mark_watched, "visibility"),
+            (act_mark_unwatched, "visibility_off"),
+            (act_delete, "delete_forever"),
+            (act_reveal_on_filesystem, "folder"),
+            (act_play, "play_circle"),
+            (act_copy_path, "copy"),
+            (act_refresh, "refresh"),
+            (act_mark_unwatched_previous, "visibility"),
+            (act_mark_watched_next, "visibility_off"),
+        ]
         self.action_list = [
             act_play,
             act_mark_watched,
@@ -174,12 +276,7 @@ class Player(MainWindow):
             logger.warning("Host player not found")
             self.local_player.not_found_warning()
 
-        self.settings_widget.txt_search_box.setText(self.config.search_text)
-        self.settings_widget.chk_hide_watched.setChecked(
-            self.config.hide_watched
-        )
-        self.settings_widget.chk_regex.setChecked(self.config.regex)
-        self.settings_widget.chk_rename.setChecked(self.config.rename)
+        self.read_filter_settings()
 
         if self.config.advanced:
             logger.info("Switching to advanced view")
@@ -200,7 +297,64 @@ class Player(MainWindow):
         )
         self.update_player_info()
 
+    def read_filter_settings(self):
+        self.settings_widget.txt_search_box.setText(self.config.search_text)
+        self.settings_widget.chk_hide_watched.setChecked(
+            self.config.hide_watched
+        )
+        self.settings_widget.chk_regex.setChecked(self.config.regex)
+        self.settings_widget.chk_rename.setChecked(self.config.rename)
+
+    def open_workdir(self, workdir: str, params: dict):
+        """Shows a directory handed off by another instance."""
+        window = self.window()
+        window.showNormal()
+        window.raise_()
+        window.activateWindow()
+        if os.path.normcase(workdir) == os.path.normcase(self.config.workdir):
+            return
+        try:
+            config = Config(workdir, params)
+        except ValueError as e:
+            logger.error("Unable to open {}: {}".format(workdir, e))
+            return
+        logger.info("Switching to {}".format(workdir))
+        if self.scanner.isRunning():
+            self.scanner.cancel()
+            self.scanner.wait()
+        # Medias of the old directory must not reach the new list
+        self.session.stop()
+        self.local_player.stop()
+        self.read_ahead.cancel()
+        self.regex_matcher.cancel()
+        # Pending renames are recorded in the old watched state
+        self.renamer.flush()
+        self.save_settings()
+        self.watched_state.close()
+        # Style, icons and the player stay those of the running window
+        self.config = config
+        self.watched_state = WatchedState.create(
+            self.config.watched_state, self.config.workdir
+        )
+        self.load_media()
+        self.read_filter_settings()
+
     def closeEvent(self, event):
+        self.watcher.stop()
+        self.regex_matcher.stop()
+        self.info_loader.stop()
+        self.renamer.stop()
+        self.session.stop()
+        self.local_player.stop()
+        self.read_ahead.stop()
+        self.watched_state.close()
+        if self.scanner.isRunning():
+            self.scanner.cancel()
+            self.scanner.wait()
+        self.save_settings()
+        return super().closeEvent(event)
+
+    def save_settings(self):
         if self.local_player.is_found():
             logger.info(
                 "Saving player info: {}".format(self.local_player.player_path)
@@ -224,86 +378,140 @@ class Player(MainWindow):
         )
         self.config.style = self.settings_widget.cmb_style.currentText().lower()
         self.config.save()
-        return super().closeEvent(event)
 
-    def restart_application(self):
-        status = message_box(
-            title="Restart now?",
-            text=(
-                "To apply changes you need to restart the application\n\n"
-                "Restart now?"
-            ),
-            icon=QMessageBox.Warning,
-            buttons=QMessageBox.Yes | QMessageBox.No,
+    def style_selected(self):
+        self.change_style(
+            Style[self.settings_widget.cmb_style.currentText().lower()],
+            IconSet[self.settings_widget.cmb_icon.currentText().lower()],
         )
-        if status == QMessageBox.Yes:
-            self.close()
-            QApplication.exit(EXIT_CODE_REBOOT)
+
+    def set_icons(self):
+        super().set_icons()
+        for action, name in self.action_icons:
+            action.setIcon(getattr(IconSet.current, name))
 
     def update_player_info(self):
         self.settings_widget.lbl_player_name.setText(self.local_player.name())
 
-    def filter_media(self):
-        total = self.lst_media.count()
-        items_hidden = 0
-        logger.info("Filtering {} medias".format(total))
-        rename = self.settings_widget.chk_rename
+    def filter_media(self, narrow: bool = False):
+        """ Applies the current filter settings to the list of medias.
+
+            With `narrow`, a filter that refines the previous one is only
+            tested against the medias that are currently shown. This is safe
+            as long as no media changed since the previous filtering, hence
+            it is only used for the search box.
+        """
+        self.filter_timer.stop()
+        self.regex_matcher.cancel()
         regex = self.settings_widget.chk_regex
-        rename.setEnabled(regex.isChecked())
-        pattern = self.settings_widget.txt_search_box.text()
-        try:
-            pattern = re.compile(pattern, re.IGNORECASE)
-        except re.error:
-            pattern = None
-        for i in range(total):
-            item = self.lst_media.item(i)
-            media = self.lst_media.itemWidget(item)
-            # Clears previous renaming
-            media.set_title(None)
-            is_hidden = False
-            for f in self.filters:
-                if f(media) is True:
-                    is_hidden = True
-                    items_hidden += 1
-                    break
-            if rename.isEnabled() and rename.isChecked() and pattern:
-                match = pattern.search(media.get_title())
-                if match:
-                    index = 0
-                    if len(match.groups()) > 0:
-                        index = 1
-                    if match.group(index):
-                        media.set_title(match.group(index))
-
-            item.setHidden(is_hidden)
-        logger.info("{} items were hidden".format(items_hidden))
-        self.init_unwatched()
+        self.settings_widget.chk_rename.setEnabled(regex.isChecked())
+        media_filter = self.get_media_filter()
+        if media_filter.regex and media_filter.pattern is not None:
+            logger.info(
+                "Matching {} medias with {}".format(
+                    self.media_model.rowCount(), media_filter
+                )
+            )
+            # The current filter stays applied until the worker is done
+            self.regex_revision = self.media_model.revision
+            self.regex_matcher.submit(media_filter, self.media_model.medias)
+            return
+        previous = self.media_filter
+        self.media_filter = media_filter
+        medias = self.filter_candidates(previous, narrow)
+        logger.info(
+            "Filtering {} medias with {}".format(len(medias), self.media_filter)
+        )
+        self.show_filtered(self.media_filter.apply(medias))
 
-    def hide_watched(self, media: MediaItem) -> bool:
-        return (
-            self.settings_widget.chk_hide_watched.isChecked()
-            and media.is_watched()
+    def filter_new_medias(self, medias: list):
+        """ Applies the current filter to medias added or renamed since the
+            list was filtered.
+
+            Regexes are only matched by the worker, the medias stay hidden
+            until it answers for the whole list. A scan refilters once it is
+            finished.
+        """
+        media_filter = self.media_filter
+        if not media_filter.regex or media_filter.pattern is None:
+            media_filter.apply(medias)
+            return
+        for media in medias:
+            media.hidden = True
+            media.title_override = None
+        if not self.scanner.isRunning():
+            self.filter_timer.start()
+
+    def show_filtered(self, visible: list):
+        selected = self.selected_medias()
+        self.media_proxy.set_visible(visible)
+        self.select_medias(selected)
+        # Renamed titles are not covered by the proxy when rows stay the same
+        self.lst_media.viewport().update()
+        logger.info(
+            "{} items were hidden".format(
+                self.media_model.rowCount() - len(visible)
+            )
         )
+        self.schedule_update()
 
-    def hide_regex_not_match(self, media: MediaItem) -> bool:
-        pattern = self.settings_widget.txt_search_box.text()
-        if not self.settings_widget.chk_regex.isChecked():
-            pattern = re.escape(pattern)
-        try:
-            pattern = re.compile(pattern, re.IGNORECASE)
-        except re.error:
-            # Failed pattern should not hide the whole list of medias
-            return False
+    def regex_matched(self, media_filter: MediaFilter, medias, matches):
+        if self.media_model.revision != self.regex_revision:
+            logger.info("Medias changed while matching, restarting")
+            self.filter_media()
+            return
+        self.media_filter = media_filter
+        self.show_filtered(media_filter.apply_matches(medias, matches))
+
+    def regex_failed(self, media_filter: MediaFilter):
+        # Leave the list unfiltered rather than guessing
+        self.media_filter = MediaFilter(hide_watched=media_filter.hide_watched)
+        self.show_filtered(self.media_filter.apply(self.media_model.medias))
+        search_box = self.settings_widget.txt_search_box
+        QToolTip.showText(
+            search_box.mapToGlobal(QPoint(0, search_box.height())),
+            "Regular expression takes too long, showing all medias",
+            search_box,
+        )
+
+    def filter_candidates(self, previous: MediaFilter, narrow: bool) -> list:
+        """ Sorted medias that have to be tested against the new filter.
+
+            The medias left out must end up hidden, the ones outside of the
+            proxy are already hidden by the previous filter.
+        """
+        media_filter = self.media_filter
+        medias = self.media_model.medias
+        if narrow and media_filter.refines(previous):
+            medias = self.media_proxy.visible
+        if media_filter.regex or previous.rename:
+            return medias
+        candidates = self.media_model.search_index.candidates(media_filter.text)
+        if candidates is None or len(candidates) >= len(medias):
+            return medias
+        for media in self.media_proxy.visible:
+            media.hidden = True
+        return sorted(candidates)
+
+    def search_media(self):
+        self.filter_media(narrow=True)
+
+    def filter_settings_changed(self, state: int):
+        # The check state must not be taken for `narrow`
+        self.filter_media()
 
-        found = bool(pattern.search(media.get_title()))
-        return not found
+    def get_media_filter(self) -> MediaFilter:
+        return MediaFilter(
+            self.settings_widget.txt_search_box.text(),
+            self.settings_widget.chk_regex.isChecked(),
+            self.settings_widget.chk_hide_watched.isChecked(),
+            self.settings_widget.chk_rename.isChecked(),
+        )
 
     def context_menu_media_list(self, position):
         menu = QMenu("Options")
         logger.info("Creating context menu for media list")
-        menu.addSection(
-            "Selected: {}".format(len(self.lst_media.selectedItems()))
-        )
+        menu.addSection("Selected: {}".format(len(self.selected_rows())))
         menu.addActions(self.action_list)
         menu.exec_(self.lst_media.mapToGlobal(position))
 
@@ -312,12 +520,39 @@ class Player(MainWindow):
         logger.info("Creating context menu for current media")
         menu.addActions(self.action_list)
         self.highlight_first_unwatched()
-        if not self.lst_media.selectedItems():
+        if not self.selected_rows():
             return
         menu.exec_(
             self.basic_view_widget.grp_current_media.mapToGlobal(position)
         )
 
+    def selected_rows(self) -> list:
+        indexes = self.lst_media.selectionModel().selectedRows()
+        return sorted(self.media_proxy.mapToSource(i).row() for i in indexes)
+
+    def selected_medias(self) -> list:
+        return [self.media_model.media(row) for row in self.selected_rows()]
+
+    def select_medias(self, medias: list):
+        rows = sorted(
+            row
+            for row in map(self.media_proxy.row_of, medias)
+            if row is not None
+        )
+        selection = QItemSelection()
+        # Contiguous rows are selected as a single range
+        for first, last in row_ranges(rows):
+            selection.select(
+                self.media_proxy.index(first), self.media_proxy.index(last)
+            )
+        selection_model = self.lst_media.selectionModel()
+        selection_model.select(selection, QItemSelectionModel.ClearAndSelect)
+        if rows:
+            # Selecting the current index would drop the other rows
+            selection_model.setCurrentIndex(
+                self.media_proxy.index(rows[0]), QItemSelectionModel.NoUpdate
+            )
+
     def select_new_player(self):
         logger.info("Selecting new player")
         if self.settings_widget.dlg_select_player.exec_() == QDialog.Accepted:
@@ -341,46 +576,81 @@ class Player(MainWindow):
     def set_media_watch_status(self, set_watched: bool):
         logger.info("Updating media status to {}".format(set_watched))
 
-        for item in self.lst_media.selectedItems():
-            media = self.lst_media.itemWidget(item)
-            if set_watched:
-                media.set_watched()
-            else:
-                media.set_unwatched()
-        self.filter_media()
+        self.update_watched(self.selected_medias(), set_watched)
 
     def mark_unwatched_previous(self):
         logger.info("Unwatching last watched")
-        total = self.lst_media.count()
-
-        for i in reversed(range(total)):
-            item = self.lst_media.item(i)
-            media = self.lst_media.itemWidget(item)
-            if not item.isHidden() and media.is_watched():
-                media.set_unwatched()
-                break
-        self.filter_media()
+        row = self.media_proxy.last_watched()
+        if row is not None:
+            self.update_watched([self.media_proxy.visible[row]], False)
 
     def mark_watched_next(self):
         logger.info("Marking next media as watched")
-        total = self.lst_media.count()
-        for i in range(total):
-            item = self.lst_media.item(i)
-            media = self.lst_media.itemWidget(item)
-            if not item.isHidden() and not media.is_watched():
-                media.set_watched()
-                break
-        self.filter_media()
+        row = self.media_proxy.next_unwatched()
+        if row is not None:
+            self.update_watched([self.media_proxy.visible[row]], True)
+
+    def update_watched(self, medias: list, watched: bool):
+        renames = self.watched_state.set_watched(medias, watched)
+        if renames:
+            self.renamer.submit(renames)
+        self.watched_filter_changed(medias)
+
+    def watched_filter_changed(self, medias: list):
+        """ Applies the current filter to medias whose watched flag changed.
+
+            Only these medias are tested, the proxy shows or hides their rows
+            on `dataChanged`. Titles did not change, the matches of a regex
+            still hold.
+        """
+        self.media_filter.update(medias)
+        self.media_model.watched_changed(medias)
+        self.schedule_update()
+
+    def rename_progress(self, renamed: int, total: int):
+        self.basic_view_widget.lbl_movie_info_title.setText(
+            "Renaming... {} of {} files".format(renamed, total)
+        )
+
+    def renames_done(self, renamed: list, errors: list):
+        for media, new_path in renamed:
+            media.set_path(new_path)
+        for media, _ in errors:
+            # The flag follows the file name again
+            media.set_path(media.path)
+        # Medias of a directory opened before are no longer listed
+        medias = [
+            media
+            for media, _ in renamed + errors
+            if self.media_model.row_of(media) is not None
+        ]
+        self.watched_state.apply(medias)
+        self.watched_filter_changed(medias)
+        if errors:
+            lines = [
+                "  {}. {}".format(i, error)
+                for i, (_, error) in enumerate(errors[:10], 1)
+            ]
+            if len(errors) > 10:
+                lines.append("  ...")
+            message_box(
+                title="Rename failed",
+                text="Unable to rename {} files\n\n{}".format(
+                    len(errors), "\n".join(lines)
+                ),
+                icon=QMessageBox.Warning,
+                buttons=QMessageBox.Ok,
+            )
 
     def delete_media_from_filesystem(self):
         logger.info("Deleting medias")
-        medias = self.lst_media.selectedItems()
+        rows = self.selected_rows()
+        medias = [self.media_model.media(row) for row in rows]
         if not medias:
             return
         lines = []
         if len(medias) < 11:
-            for i, item in enumerate(medias, 1):
-                m = self.lst_media.itemWidget(item)
+            for i, m in enumerate(medias, 1):
                 lines.append("  {}. {}".format(i, m.get_title()))
         msg = "\n".join(lines)
         status = message_box(
@@ -393,104 +663,145 @@ class Player(MainWindow):
         )
         logger.info("{} files to be deleted".format(len(medias)))
         if status == QMessageBox.Ok:
-            for item in medias:
-                media = self.lst_media.itemWidget(item)
+            for media in medias:
                 try:
-                    media.path.unlink()
+                    os.remove(media.path)
                 except OSError:
                     logger.error("Unable to delete file {}".format(media.path))
-                self.lst_media.takeItem(self.lst_media.row(item))
+            self.media_model.remove_rows(rows)
 
             self.filter_media()
 
     def reveal_on_filesystem(self):
-        medias = self.lst_media.selectedItems()
+        medias = self.selected_medias()
         logger.info("Opening file location for {} files".format(medias))
-        for item in medias:
-            media = self.lst_media.itemWidget(item)
+        for media in medias:
             click.launch(win_short_path(media.path), locate=True)
 
     def copy_item_path(self):
         logger.info("Getting media path")
-        medias = self.lst_media.selectedItems()
+        medias = self.selected_medias()
         if medias:
-            media = self.lst_media.itemWidget(medias[0])
+            media = medias[0]
             cb = QApplication.clipboard()
-            cb.setText(str(media.path))
+            cb.setText(media.path)
             logger.info("{} copied to the clipboard".format(media))
 
+    def refresh_media(self):
+        if self.scanner.isRunning():
+            self.scanner.cancel()
+        else:
+            self.load_media()
+
     def load_media(self):
-        # https://stackoverflow.com/a/25188862/8014793
-        self.lst_media.clear()
-        medias = []
+        if self.scanner.isRunning():
+            logger.warning("Media scan is already running")
+            return
+        self.watcher.stop()
+        self.info_loader.clear()
+        self.media_model.clear()
         logger.info(
             "Loading media from filesystem: {}".format(self.config.workdir)
         )
-        for f in Path(self.config.workdir).rglob("*"):
-            f = normpath(f)
-            if f.suffix.lower() in EXTENSIONS_MEDIA:
-                medias.append(MediaItem(f))
-        medias.sort()
-        logger.info("{} medias found ".format(len(medias)))
-        for m in medias:
-            item = QListWidgetItem(self.lst_media)
-            # Set size hint
-            item.setSizeHint(m.sizeHint())
-            # Add QListWidgetItem into QListWidget
-            self.lst_media.addItem(item)
-            self.lst_media.setItemWidget(item, m)
+        self.basic_view_widget.btn_refresh.setToolTip("Cancel scan")
+        self.basic_view_widget.lbl_movie_info_title.setText("Scanning...")
+        self.scanner.set_workdir(self.config.workdir)
+        self.scanner.start()
+
+    def add_media_batch(self, paths: list):
+        medias = [MediaRecord(p) for p in paths]
+        self.watched_state.apply(medias)
+        self.filter_new_medias(medias)
+        # Keeps the list sorted, batches arrive in directory order
+        self.media_model.add_medias(medias)
+        self.info_loader.preload(medias)
+
+    def scan_progress(self, dirs_scanned: int, media_found: int):
+        self.basic_view_widget.lbl_movie_info_title.setText(
+            "Scanning... {} medias in {} directories".format(
+                media_found, dirs_scanned
+            )
+        )
+
+    def scan_finished(self):
+        logger.info("{} medias found ".format(self.media_model.rowCount()))
+        self.basic_view_widget.btn_refresh.setToolTip("Refresh")
         self.filter_media()
-        self.highlight_first_unwatched()
+        self.schedule_update(highlight=True)
+        self.watcher.start(self.scanner.index)
+
+    def media_changed(self, added: list, removed: list, renamed: list):
+        logger.info(
+            "Filesystem changed: {} added, {} removed, {} renamed".format(
+                len(added), len(removed), len(renamed)
+            )
+        )
+        rows = {m.path: i for i, m in enumerate(self.media_model.medias)}
+
+        for old_path, new_path in renamed:
+            row = rows.pop(old_path, None)
+            # Files renamed by us are already up to date
+            if row is None:
+                continue
+            media = self.media_model.media(row)
+            media.set_path(new_path)
+            self.watched_state.renamed(media, old_path)
+            self.filter_new_medias([media])
+            self.media_model.media_changed(row)
+            rows[new_path] = row
+
+        self.media_model.remove_rows(
+            [rows.pop(p) for p in removed if p in rows]
+        )
+
+        added = [p for p in added if p not in rows]
+        if added:
+            self.watched_state.adopt(added)
+            self.add_media_batch(added)
+        self.schedule_update()
+
+    def schedule_update(self, highlight: bool = False):
+        """ Marks the current media panel and the counters as outdated, and
+            the selection too with `highlight`.
+        """
+        self.highlight_pending = self.highlight_pending or highlight
+        if not self.update_timer.isActive():
+            self.update_timer.start()
+
+    def update_views(self):
+        self.init_unwatched()
+        if self.highlight_pending:
+            self.highlight_pending = False
+            self.highlight_first_unwatched()
 
     def highlight_first_unwatched(self):
         self.lst_media.clearSelection()
-
-        total = self.lst_media.count()
-        for i in range(total):
-            item = self.lst_media.item(i)
-            media = self.lst_media.itemWidget(item)
-            if not item.isHidden() and not media.is_watched():
-                item.setSelected(True)
-                self.lst_media.scrollToItem(
-                    item, QAbstractItemView.PositionAtCenter
-                )
-                return
+        row = self.media_proxy.next_unwatched()
+        if row is None:
+            return
+        index = self.media_proxy.index(row)
+        self.lst_media.selectionModel().select(
+            index, QItemSelectionModel.Select
+        )
+        self.lst_media.scrollTo(index, QAbstractItemView.PositionAtCenter)
 
     def init_unwatched(self):
-        self.basic_view_widget.lbl_movie_info_time.set_duration(None)
-        self.basic_view_widget.lbl_movie_info_size.setText(NOT_AVAILABLE)
-        self.basic_view_widget.lbl_movie_info_res.setText(NOT_AVAILABLE)
-        self.basic_view_widget.lbl_movie_info_title.setText(FINISHED)
-
-        total = self.lst_media.count()
+        total = self.media_model.rowCount()
         logger.info("Initializing {} media".format(total))
-        watched = 0
-        unwatched_initialized = False
-        for i in range(total):
-            item = self.lst_media.item(i)
-            media = self.lst_media.itemWidget(item)
-            if media.is_watched():
-                watched += 1
-            elif not item.isHidden() and not unwatched_initialized:
-                unwatched_initialized = True
-                media.parse_media_info()
-                logger.info("Setting current media to {}".format(media))
-                if media.duration is not None:
-                    self.basic_view_widget.lbl_movie_info_time.set_duration(
-                        media.duration
-                    )
-                if media.size is not None:
-                    self.basic_view_widget.lbl_movie_info_size.setText(
-                        format_size(media.size)
-                    )
-
-                if all((media.width, media.height)):
-                    self.basic_view_widget.lbl_movie_info_res.setText(
-                        "{}x{}".format(media.width, media.height)
-                    )
-                self.basic_view_widget.lbl_movie_info_title.setText(
-                    media.get_title()
-                )
+        watched = self.media_model.watched_count()
+        current = None
+        upcoming = []
+        row = self.media_proxy.next_unwatched()
+        if row is not None:
+            current = self.media_proxy.visible[row]
+        while row is not None and len(upcoming) < MEDIA_INFO_PREFETCH:
+            row = self.media_proxy.next_unwatched(row + 1)
+            if row is not None:
+                upcoming.append(self.media_proxy.visible[row])
+        self.current_media = current
+        self.show_media_info(current)
+        if current is not None:
+            self.info_loader.request([current] + upcoming)
 
         logger.info("Medias watched {}".format(watched))
         self.basic_view_widget.pbr_watched.setMaximum(total)
@@ -499,45 +810,183 @@ class Player(MainWindow):
             "{} left to watch".format(total - watched)
         )
 
-    def playback_started(self):
-        logger.info("Disabling widgets")
-        self.setDisabled(True)
+    def show_media_info(self, media: MediaRecord):
+        self.basic_view_widget.lbl_movie_info_time.set_duration(None)
+        self.basic_view_widget.lbl_movie_info_size.setText(NOT_AVAILABLE)
+        self.basic_view_widget.lbl_movie_info_res.setText(NOT_AVAILABLE)
+        self.basic_view_widget.lbl_movie_info_title.setText(FINISHED)
+        if media is None:
+            return
+        logger.info("Setting current media to {}".format(media))
+        if media.duration is not None:
+            self.basic_view_widget.lbl_movie_info_time.set_duration(
+                media.duration
+            )
+        if media.size is not None:
+            self.basic_view_widget.lbl_movie_info_size.setText(
+                format_size(media.size)
+            )
 
-    def playback_finished(self):
-        logger.info("Enabling widgets")
-        self.setEnabled(True)
-        self.local_player.media.set_watched()
-        self.filter_media()
-        self.highlight_first_unwatched()
+        if all((media.width, media.height)):
+            self.basic_view_widget.lbl_movie_info_res.setText(
+                "{}x{}".format(media.width, media.height)
+            )
+        self.basic_view_widget.lbl_movie_info_title.setText(media.get_title())
+
+    def list_scrolled(self, value: int):
+        self.scrolling_up = value < self.scroll_value
+        self.scroll_value = value
+        self.viewport_timer.start()
+
+    def load_visible_info(self):
+        """ Requests the media info of the rows in the viewport.
+
+            The visible rows come first, then the rows ahead in the scroll
+            direction and the rows behind. Rows scrolled out of this range
+            are dropped from the loader queue.
+        """
+        visible = self.media_proxy.visible
+        if not visible:
+            self.info_loader.request_visible([])
+            return
+        viewport = self.lst_media.viewport().rect()
+        first = self.lst_media.indexAt(viewport.topLeft()).row()
+        last = self.lst_media.indexAt(viewport.bottomLeft()).row()
+        if first < 0:
+            first = 0
+        if last < 0:
+            # The rows do not fill the viewport
+            last = len(visible) - 1
+        above = range(
+            first - 1, max(first - MEDIA_INFO_SCROLL_AHEAD, 0) - 1, -1
+        )
+        below = range(
+            last + 1, min(last + 1 + MEDIA_INFO_SCROLL_AHEAD, len(visible))
+        )
+        if self.scrolling_up:
+            rows = chain(range(first, last + 1), above, below)
+        else:
+            rows = chain(range(first, last + 1), below, above)
+        self.info_loader.request_visible([visible[row] for row in rows])
+
+    def media_info_loaded(self, media: MediaRecord, info):
+        media.set_media_info(info)
+        row = self.media_model.row_of(media)
+        if row is not None:
+            self.media_model.info_changed(row)
+        if media is self.current_media:
+            self.show_media_info(media)
+
+    def media_info_cached(self, loaded: list):
+        for media, info in loaded:
+            media.set_media_info(info)
+            if media is self.current_media:
+                self.show_media_info(media)
+        self.lst_media.viewport().update()
+
+    def playback_started(self, media: MediaRecord):
+        logger.info("Playback started: {}".format(media))
+
+    def playback_finished(self, media: MediaRecord, success: bool):
+        if self.media_model.row_of(media) is None:
+            logger.info("{} is no longer listed".format(media))
+        elif success:
+            logger.info("Playback finished: {}".format(media))
+            self.update_watched([media], True)
+        else:
+            logger.warning("Playback failed, not marking {}".format(media))
+        self.schedule_update(highlight=True)
 
-    def get_first_unwatched(self) -> MediaItem:
+    def get_first_unwatched(self) -> MediaRecord:
         logger.info("Getting first unwatched media")
-        total = self.lst_media.count()
-        for i in range(total):
-            item = self.lst_media.item(i)
-            media = self.lst_media.itemWidget(item)
-            if not media.is_watched():
-                logger.info("Found: {}".format(media))
-                return media
-        logger.warning("No unwatched media found")
-        return None
+        row = self.media_proxy.next_unwatched()
+        if row is None:
+            logger.warning("No unwatched media found")
+            return None
+        media = self.media_proxy.visible[row]
+        logger.info("Found: {}".format(media))
+        return media
+
+    def next_unwatched_medias(
+        self, after: MediaRecord, count: int, skip=()
+    ) -> list:
+        """ Up to `count` unwatched medias after `after` in the list order,
+            leaving out the medias of `skip`.
+        """
+        skip = set(skip)
+        medias = []
+        row = self.media_proxy.next_unwatched(self.media_proxy.row_after(after))
+        while row is not None and len(medias) < count:
+            media = self.media_proxy.visible[row]
+            if media not in skip:
+                medias.append(media)
+            row = self.media_proxy.next_unwatched(row + 1)
+        return medias
 
     def play_selected_item(self):
         logger.info("Getting media")
-        medias = self.lst_media.selectedItems()
+        medias = self.selected_medias()
         if medias:
-            media = self.lst_media.itemWidget(medias[0])
+            media = medias[0]
             logger.info("Playing media {}".format(media))
             self.play_media(media)
 
-    def play_media(self, media: MediaItem):
-        if self.local_player.is_found():
-            logger.warning("Player found, playing {}".format(media))
-            self.local_player.set_media(media)
-            self.local_player.start()
-        else:
+    def play_media(self, media: MediaRecord):
+        if not self.local_player.is_found():
             logger.warning("Player not found")
             self.local_player.not_found_warning()
+        elif self.session_enabled:
+            logger.info("Playing {} in the player session".format(media))
+            queue = self.next_unwatched_medias(media, self.config.queue_size)
+            self.session.play(self.local_player.player_path, media, queue)
+            self.read_ahead_after(queue[-1] if queue else media)
+        else:
+            logger.warning("Player found, playing {}".format(media))
+            self.local_player.set_media(media, self.read_ahead.path(media))
+            self.local_player.start()
+            self.read_ahead_after(media)
+
+    def read_ahead_after(self, media: MediaRecord):
+        """Reads the media that will be handed to the player after `media`."""
+        medias = self.next_unwatched_medias(media, 1)
+        if medias:
+            self.read_ahead.prefetch(medias[0])
+
+    def session_media_finished(self, media: MediaRecord):
+        if self.media_model.row_of(media) is None:
+            logger.info("{} is no longer listed".format(media))
+            return
+        self.update_watched([media], True)
+        self.schedule_update(highlight=True)
+        queued = self.session.queued()
+        if queued:
+            # The player moved on to the next queued media, top the queue up
+            missing = 1 + self.config.queue_size - len(queued)
+            if missing > 0:
+                self.session.enqueue(
+                    self.next_unwatched_medias(queued[-1], missing, queued)
+                )
+                self.read_ahead_after(self.session.queued()[-1])
+            return
+        media = self.get_first_unwatched()
+        if media is not None:
+            self.play_media(media)
+
+    def session_failed(self, media: MediaRecord):
+        logger.warning("Player session failed, disabling it")
+        self.session_enabled = False
+        text = (
+            "Unable to control {} over IPC, only mpv is supported.\n"
+            "Medias will be played in a new player window each time."
+        ).format(self.local_player.name())
+        message_box(
+            title="Player session failed",
+            text=text,
+            icon=QMessageBox.Warning,
+            buttons=QMessageBox.Ok,
+        )
+        if media is not None:
+            self.play_media(media)
 
     def play_button_pressed(self):
         media = self.get_first_unwatched()
@@ -0,0 +1,218 @@
+import json
+import logging
+import os
+import tempfile
+import time
+
+from PyQt5.QtCore import QObject, QProcess, QTimer, pyqtSignal
+from PyQt5.QtNetwork import QLocalSocket
+
+from folderplay import __version__ as about
+from folderplay.constants import (
+    SESSION_CONNECT_INTERVAL,
+    SESSION_CONNECT_TIMEOUT,
+)
+from folderplay.utils import is_windows, win_short_path
+
+logger = logging.getLogger(__name__)
+
+
+def ipc_server_name() -> str:
+    name = "{}-mpv-{}".format(about.__title__, os.getpid())
+    if is_windows():
+        return "\\\\.\\pipe\\" + name
+    return os.path.join(tempfile.gettempdir(), name + ".sock")
+
+
+class MpvSession(QObject):
+    """ Keeps one mpv process open and plays medias through its JSON IPC.
+
+        Starting a player for every episode costs seconds of startup and
+        codec probing. The session starts mpv once, idle, loads medias with
+        `loadfile` and reports the ones that played to the end. Any player
+        speaking the same protocol on `--input-ipc-server` works.
+
+        Medias queued after the current one are appended to the playlist of
+        the player, which moves on to them without a gap. Playlist entries
+        are matched to medias by the ids returned by `loadfile`.
+    """
+
+    # Media that played to the end of the file
+    media_finished = pyqtSignal(object)
+    # Media that was not played, the player could not be controlled
+    failed = pyqtSignal(object)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.server_name = None
+        # Medias in the player playlist, the current one first
+        self.playlist = []
+        # Playlist entry id -> media
+        self.entries = {}
+        # Request id -> media of the `loadfile` commands without reply
+        self.requests = {}
+        self.pending = None
+        # Path the player opens for a media, a local copy may be used
+        self.path_of = lambda media: media.path
+        self.buffer = b""
+        self.request_id = 0
+        self.connect_started = 0
+
+        self.process = QProcess(self)
+        self.process.finished.connect(self.process_finished)
+
+        self.socket = QLocalSocket(self)
+        self.socket.connected.connect(self.load_pending)
+        self.socket.readyRead.connect(self.read_messages)
+
+        # mpv creates the socket shortly after it starts
+        self.connect_timer = QTimer(self)
+        self.connect_timer.setInterval(SESSION_CONNECT_INTERVAL)
+        self.connect_timer.timeout.connect(self.try_connect)
+
+    def is_running(self) -> bool:
+        return self.process.state() != QProcess.NotRunning
+
+    def is_connected(self) -> bool:
+        return self.socket.state() == QLocalSocket.ConnectedState
+
+    def play(self, player_path, media, queue: list = ()):
+        """Plays `media` now and the medias of `queue` after it."""
+        self.pending = [media] + list(queue)
+        if self.is_connected():
+            self.load_pending()
+        elif not self.is_running():
+            self.start(player_path)
+
+    def start(self, player_path):
+        self.server_name = ipc_server_name()
+        if not is_windows() and os.path.exists(self.server_name):
+            os.unlink(self.server_name)
+        args = [
+            "--idle=yes",
+            "--force-window=yes",
+            "--input-ipc-server={}".format(self.server_name),
+        ]
+        logger.info("Starting player session: {} {}".format(player_path, args))
+        self.process.start(str(player_path), args)
+        self.connect_started = time.monotonic()
+        self.connect_timer.start()
+
+    def try_connect(self):
+        if self.is_connected():
+            self.connect_timer.stop()
+            return
+        if time.monotonic() - self.connect_started > (
+            SESSION_CONNECT_TIMEOUT / 1000
+        ):
+            logger.error("Unable to connect to the player session")
+            media = self.pending[0] if self.pending else None
+            self.stop()
+            self.failed.emit(media)
+            return
+        if self.socket.state() == QLocalSocket.UnconnectedState:
+            self.socket.connectToServer(self.server_name)
+
+    def load_pending(self):
+        self.connect_timer.stop()
+        medias, self.pending = self.pending, None
+        if not medias:
+            return
+        logger.info("Loading {} in the player session".format(medias[0]))
+        # Entries of the replaced playlist still end, they stay mapped
+        self.playlist = []
+        self.send("playlist-clear")
+        self.load(medias[0], "replace")
+        self.enqueue(medias[1:])
+
+    def queued(self) -> list:
+        return list(self.playlist)
+
+    def enqueue(self, medias: list):
+        if not self.is_connected():
+            return
+        for media in medias:
+            logger.info("Queueing {} in the player session".format(media))
+            self.load(media, "append")
+
+    def load(self, media, mode: str):
+        self.playlist.append(media)
+        request_id = self.send(
+            "loadfile", win_short_path(self.path_of(media)), mode
+        )
+        self.requests[request_id] = media
+
+    def send(self, *command) -> int:
+        self.request_id += 1
+        message = {"command": list(command), "request_id": self.request_id}
+        self.socket.write(json.dumps(message).encode("utf-8") + b"\n")
+        self.socket.flush()
+        return self.request_id
+
+    def read_messages(self):
+        self.buffer += bytes(self.socket.readAll())
+        lines = self.buffer.split(b"\n")
+        self.buffer = lines.pop()
+        for line in lines:
+            try:
+                message = json.loads(line.decode("utf-8"))
+            except ValueError:
+                logger.warning("Invalid player message: {!r}".format(line))
+                continue
+            self.handle_message(message)
+
+    def handle_message(self, message: dict):
+        event = message.get("event")
+        if event == "end-file":
+            self.file_ended(message)
+        elif event is None:
+            media = self.requests.pop(message.get("request_id"), None)
+            if message.get("error", "success") != "success":
+                logger.warning("Player command failed: {}".format(message))
+                if media in self.playlist:
+                    self.playlist.remove(media)
+            elif media is not None and isinstance(message.get("data"), dict):
+                entry_id = message["data"].get("playlist_entry_id")
+                if entry_id is not None:
+                    self.entries[entry_id] = media
+
+    def file_ended(self, message: dict):
+        entry_id = message.get("playlist_entry_id")
+        if entry_id in self.entries:
+            media = self.entries.pop(entry_id)
+        elif self.playlist and (entry_id is None or not self.entries):
+            # Players without entry ids play the playlist in order
+            media = self.playlist[0]
+        else:
+            return
+        if media in self.playlist:
+            self.playlist.remove(media)
+        # Skipped or stopped files end with another reason
+        if message.get("reason") == "eof":
+            self.media_finished.emit(media)
+
+    def process_finished(self):
+        logger.info("Player session exited")
+        connecting = self.connect_timer.isActive()
+        media = self.pending[0] if self.pending else None
+        self.connect_timer.stop()
+        self.socket.abort()
+        self.playlist = []
+        self.entries = {}
+        self.requests = {}
+        self.pending = None
+        self.buffer = b""
+        if connecting:
+            logger.error("Player exited before accepting commands")
+            self.failed.emit(media)
+
+    def stop(self):
+        self.connect_timer.stop()
+        if not self.is_running():
+            return
+        if self.is_connected():
+            self.send("quit")
+            if self.process.waitForFinished(1000):
+                return
+        self.process.kill()
+        self.process.waitForFinished(1000)
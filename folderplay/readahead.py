@@ -0,0 +1,251 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from enum import Enum
+from pathlib import Path
+
+from PyQt5.QtCore import QThread
+
+from folderplay.constants import (
+    READ_AHEAD_CACHE_SIZE,
+    READ_AHEAD_CHUNK,
+    READ_AHEAD_PAGECACHE_SIZE,
+    READ_AHEAD_RATE,
+)
+from folderplay.utils import cache_dir, normpath
+
+logger = logging.getLogger(__name__)
+
+PART_SUFFIX = ".part"
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Throttle:
+    """Sleeps between chunks so reads stay under `rate` bytes per second."""
+
+    def __init__(self, rate: int, cancelled: threading.Event):
+        self.rate = rate
+        self.cancelled = cancelled
+        self.started = time.monotonic()
+        self.total = 0
+
+    def consume(self, size: int):
+        self.total += size
+        delay = self.total / self.rate - (time.monotonic() - self.started)
+        # Waiting on the event wakes up as soon as the read is cancelled
+        if self.cancelled.wait(max(delay, 0)):
+            raise Cancelled()
+
+
+class ReadAhead(QThread):
+    """ Reads the media that plays next while the current one plays.
+
+        Players fill their buffer slowly from a network share and the first
+        minute of a media stutters. In `pagecache` mode the beginning of the
+        next media is read and dropped, which leaves it in the page cache of
+        the system. In `copy` mode the whole file is copied to a local cache
+        directory, evicting the least recently used copies, and the player
+        opens the copy once it is complete.
+
+        Reads are throttled to leave bandwidth to the playing media. One
+        media is read at a time, asking for another one cancels the read in
+        progress.
+    """
+
+    class Mode(Enum):
+        off = "off"
+        pagecache = "pagecache"
+        copy = "copy"
+
+        @classmethod
+        def names(cls):
+            return [m.name for m in cls]
+
+    @staticmethod
+    def create(mode: Mode, parent=None) -> "ReadAhead":
+        if isinstance(mode, str):
+            mode = ReadAhead.Mode[mode]
+        logger.info("Setting read ahead mode: {}".format(mode.name))
+        cache_path = None
+        if mode == ReadAhead.Mode.copy:
+            cache_path = cache_dir() / "readahead"
+            cache_path.mkdir(parents=True, exist_ok=True)
+        return ReadAhead(mode, cache_path, parent=parent)
+
+    def __init__(
+        self,
+        mode: Mode,
+        cache_path: Path = None,
+        cache_size: int = READ_AHEAD_CACHE_SIZE,
+        rate: int = READ_AHEAD_RATE,
+        *args,
+        **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.mode = mode
+        self.cache_path = cache_path
+        self.cache_size = cache_size
+        self.rate = rate
+        self.pending = None
+        self.reading = None
+        self.lock = threading.Lock()
+        self.cancelled = threading.Event()
+        self.finished.connect(self.restart)
+
+    def prefetch(self, media):
+        if self.mode == self.Mode.off:
+            return
+        with self.lock:
+            if media is self.reading:
+                return
+            self.pending = media
+            if self.reading is not None:
+                logger.info("Cancelling read ahead of {}".format(self.reading))
+                self.cancelled.set()
+        self.restart()
+
+    def cancel(self):
+        with self.lock:
+            self.pending = None
+            self.cancelled.set()
+
+    def restart(self):
+        if self.pending is not None and not self.isRunning():
+            self.start()
+
+    def stop(self):
+        self.cancel()
+        self.requestInterruption()
+        self.wait()
+
+    def copy_path(self, media) -> Path:
+        """Path of the local copy, it changes with the size and the mtime."""
+        stat = os.stat(normpath(media.path))
+        key = "{}\0{}\0{}".format(media.path, stat.st_size, stat.st_mtime_ns)
+        name = hashlib.sha1(key.encode("utf-8", "surrogatepass")).hexdigest()
+        return self.cache_path / (name + Path(media.path).suffix)
+
+    def local_path(self, media) -> str:
+        """Path of the complete local copy of `media`, or None."""
+        if self.mode != self.Mode.copy:
+            return None
+        try:
+            path = self.copy_path(media)
+            # The modification time orders copies for eviction
+            os.utime(str(path))
+        except OSError:
+            return None
+        return str(path)
+
+    def path(self, media) -> str:
+        """Path the player should open for `media`."""
+        return self.local_path(media) or media.path
+
+    def run(self):
+        while not self.isInterruptionRequested():
+            with self.lock:
+                media, self.pending = self.pending, None
+                self.reading = media
+                self.cancelled.clear()
+            if media is None:
+                break
+            started = time.monotonic()
+            try:
+                if self.mode == self.Mode.copy:
+                    self.copy(media)
+                else:
+                    self.read(media)
+            except Cancelled:
+                pass
+            except OSError as e:
+                logger.error("Unable to read ahead {}: {}".format(media, e))
+            else:
+                logger.info(
+                    "Read ahead {} in {:.1f}s".format(
+                        media, time.monotonic() - started
+                    )
+                )
+            finally:
+                with self.lock:
+                    self.reading = None
+
+    def read_chunks(self, src, limit: int):
+        """Yields chunks of `src`, throttled, up to `limit` bytes."""
+        throttle = Throttle(self.rate, self.cancelled)
+        buffer = bytearray(READ_AHEAD_CHUNK)
+        view = memoryview(buffer)
+        remaining = limit
+        while remaining > 0:
+            if self.isInterruptionRequested():
+                raise Cancelled()
+            size = src.readinto(view[: min(remaining, len(buffer))])
+            if not size:
+                break
+            remaining -= size
+            yield view[:size]
+            throttle.consume(size)
+
+    def read(self, media):
+        logger.info("Reading ahead {}".format(media))
+        with open(normpath(media.path), "rb", buffering=0) as src:
+            if hasattr(os, "posix_fadvise"):
+                # Local disks start reading right away, network shares
+                # mostly ignore the hint and need the reads below
+                os.posix_fadvise(
+                    src.fileno(),
+                    0,
+                    READ_AHEAD_PAGECACHE_SIZE,
+                    os.POSIX_FADV_WILLNEED,
+                )
+            for _ in self.read_chunks(src, READ_AHEAD_PAGECACHE_SIZE):
+                pass
+
+    def copy(self, media):
+        path = self.copy_path(media)
+        if path.exists():
+            return
+        size = os.path.getsize(normpath(media.path))
+        if size > self.cache_size:
+            logger.info("{} does not fit the read ahead cache".format(media))
+            return
+        self.evict(self.cache_size - size)
+        logger.info("Copying {} to {}".format(media, path))
+        part = path.with_name(path.name + PART_SUFFIX)
+        try:
+            with open(normpath(media.path), "rb", buffering=0) as src:
+                with part.open("wb") as dst:
+                    for chunk in self.read_chunks(src, size):
+                        dst.write(chunk)
+            os.replace(str(part), str(path))
+        except BaseException:
+            if part.exists():
+                part.unlink()
+            raise
+
+    def evict(self, available: int):
+        """ Removes the least recently used copies until `available` bytes
+            are free.
+        """
+        copies = []
+        for entry in os.scandir(str(self.cache_path)):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if entry.name.endswith(PART_SUFFIX):
+                # Leftover of an interrupted copy
+                os.unlink(entry.path)
+                continue
+            copies.append((stat.st_mtime, stat.st_size, entry.path))
+        used = sum(size for _, size, _ in copies)
+        for _, size, path in sorted(copies):
+            if used <= available:
+                break
+            logger.info("Evicting read ahead copy {}".format(path))
+            os.unlink(path)
+            used -= size
@@ -0,0 +1,131 @@
+import logging
+import multiprocessing
+import time
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from folderplay.constants import REGEX_POLL_INTERVAL, REGEX_TIME_BUDGET
+
+logger = logging.getLogger(__name__)
+
+# Forking a process that runs threads may copy a lock held by one of them
+mp_context = multiprocessing.get_context("spawn")
+
+
+def serve(conn):
+    """Worker process loop, answers `(filter, titles)` requests."""
+    while True:
+        try:
+            media_filter, titles = conn.recv()
+        except (EOFError, OSError):
+            return
+        conn.send(media_filter.match_titles(titles))
+
+
+class RegexMatcher(QObject):
+    """ Matches titles against user regexes in a worker process.
+
+        Python regexes cannot be interrupted, a pattern with catastrophic
+        backtracking would freeze the GUI thread. A query that runs out of
+        its time budget or is superseded by a new one is stopped by
+        terminating the worker, a fresh one is started right away.
+
+        Workers are spawned rather than forked, the GUI process runs
+        several threads by the time a query is made.
+    """
+
+    # Filter, medias, (index, renamed title) pairs of the matching medias
+    matched = pyqtSignal(object, list, list)
+    # Filter, when the query timed out or the worker died
+    failed = pyqtSignal(object)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.process = None
+        self.conn = None
+        self.media_filter = None
+        self.medias = []
+        self.started = 0
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(REGEX_POLL_INTERVAL)
+        self.poll_timer.timeout.connect(self.poll)
+
+    def is_running(self) -> bool:
+        return self.media_filter is not None
+
+    def start(self):
+        """Starts the worker ahead of the first query."""
+        if self.process is None:
+            self.start_process()
+
+    def submit(self, media_filter, medias: list):
+        self.cancel()
+        self.start()
+        self.media_filter = media_filter
+        self.medias = list(medias)
+        self.started = time.monotonic()
+        try:
+            self.conn.send((media_filter, [m.title for m in self.medias]))
+        except OSError:
+            logger.exception("Regex worker failed")
+            self.restart()
+            self.failed.emit(media_filter)
+            return
+        self.poll_timer.start()
+
+    def cancel(self):
+        if not self.is_running():
+            return
+        logger.info("Cancelling regex query {}".format(self.media_filter))
+        # The worker may be stuck inside the pattern
+        self.restart()
+
+    def restart(self):
+        self.stop()
+        self.start_process()
+
+    def stop(self):
+        self.poll_timer.stop()
+        self.media_filter = None
+        self.medias = []
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.conn.close()
+            self.process = None
+            self.conn = None
+
+    def start_process(self):
+        self.conn, child_conn = mp_context.Pipe()
+        self.process = mp_context.Process(
+            target=serve, args=(child_conn,), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def poll(self):
+        if self.conn.poll():
+            try:
+                matches = self.conn.recv()
+            except (EOFError, OSError):
+                logger.exception("Regex worker failed")
+                matches = None
+            media_filter, medias = self.media_filter, self.medias
+            self.poll_timer.stop()
+            self.media_filter = None
+            self.medias = []
+            if matches is None:
+                self.restart()
+                self.failed.emit(media_filter)
+            else:
+                self.matched.emit(media_filter, medias, matches)
+        elif time.monotonic() - self.started > REGEX_TIME_BUDGET / 1000:
+            media_filter = self.media_filter
+            logger.warning(
+                "Regex query {} exceeded {} ms".format(
+                    media_filter, REGEX_TIME_BUDGET
+                )
+            )
+            self.restart()
+            self.failed.emit(media_filter)
@@ -0,0 +1,106 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from folderplay.constants import RENAME_PROGRESS_INTERVAL, RENAME_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+def rename_file(path: str, new_path: str):
+    """Runs in a pool thread."""
+    if path == new_path:
+        return
+    if os.path.exists(new_path):
+        raise FileExistsError("File already exists {}".format(new_path))
+    os.rename(path, new_path)
+
+
+class BatchRenamer(QThread):
+    """ Renames batches of files on a pool of threads.
+
+        Every rename is a round trip on a network share, the files of a
+        batch are renamed in parallel and off the GUI thread. A file is left
+        untouched when its new path exists, errors are collected per file
+        and do not stop the rest of the batch. Batches are renamed in the
+        order they are submitted.
+    """
+
+    # Files renamed so far, files in the batch
+    progress = pyqtSignal(int, int)
+    # (media, new path) pairs of the renamed files, (media, error) pairs
+    done = pyqtSignal(list, list)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batches = deque()
+        self.lock = threading.Lock()
+        self.finished.connect(self.restart)
+
+    def submit(self, renames: list):
+        """Queues `(media, path, new path)` renames."""
+        with self.lock:
+            self.batches.append(list(renames))
+        self.restart()
+
+    def restart(self):
+        if self.batches and not self.isRunning():
+            self.start()
+
+    def flush(self):
+        """Renames the queued batches and waits until they are done."""
+        while True:
+            self.wait()
+            with self.lock:
+                if not self.batches:
+                    return
+            self.start()
+
+    def stop(self):
+        with self.lock:
+            self.batches.clear()
+        self.requestInterruption()
+        self.wait()
+
+    def run(self):
+        with ThreadPoolExecutor(max_workers=RENAME_WORKERS) as executor:
+            while not self.isInterruptionRequested():
+                with self.lock:
+                    if not self.batches:
+                        break
+                    renames = self.batches.popleft()
+                self.rename(executor, renames)
+
+    def rename(self, executor, renames: list):
+        logger.info("Renaming {} files".format(len(renames)))
+        futures = {
+            executor.submit(rename_file, path, new_path): (media, new_path)
+            for media, path, new_path in renames
+        }
+        renamed = []
+        errors = []
+        last_progress = time.monotonic()
+        for count, future in enumerate(as_completed(futures), 1):
+            media, new_path = futures[future]
+            try:
+                future.result()
+            except OSError as e:
+                logger.error("Unable to rename {}: {}".format(media.path, e))
+                errors.append((media, str(e)))
+            else:
+                renamed.append((media, new_path))
+            now = time.monotonic()
+            if now - last_progress >= RENAME_PROGRESS_INTERVAL:
+                self.progress.emit(count, len(renames))
+                last_progress = now
+            if self.isInterruptionRequested():
+                # Renames in progress complete, the others never start
+                for f in futures:
+                    f.cancel()
+                break
+        self.done.emit(renamed, errors)
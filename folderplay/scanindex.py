@@ -0,0 +1,105 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from folderplay.utils import cache_dir
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+# Directory mtimes closer than this to the scan time are not trusted, a
+# change within the filesystem timestamp granularity would go unnoticed
+MTIME_RACE_WINDOW_NS = 2 * 10**9
+
+
+class ScanIndex:
+    """ On-disk index of a scanned directory tree.
+
+        Maps every directory to its mtime, subdirectory names and media file
+        names. A directory is listed again only when its mtime changes.
+    """
+
+    def __init__(self, root: str, path: Path):
+        self.root = root
+        self.path = path
+        self.dirs = {}
+        self.dirty = False
+
+    @classmethod
+    def for_workdir(cls, workdir: str) -> "ScanIndex":
+        digest = hashlib.sha1(os.path.normcase(workdir).encode("utf-8"))
+        name = "scan-{}.json".format(digest.hexdigest()[:16])
+        return cls(workdir, cache_dir() / name)
+
+    def load(self):
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(
+                "Ignoring unreadable scan index %s: %s", self.path, e
+            )
+            return
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != INDEX_VERSION
+            or data.get("root") != self.root
+        ):
+            logger.info("Ignoring outdated scan index %s", self.path)
+            return
+        self.dirs = data["dirs"]
+        logger.info(
+            "Loaded scan index with {} directories".format(len(self.dirs))
+        )
+
+    def save(self):
+        if not self.dirty:
+            return
+        data = {"version": INDEX_VERSION, "root": self.root, "dirs": self.dirs}
+        # Write to a temporary file first so a crash never leaves a
+        # truncated index behind
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=self.path.name, suffix=".tmp", dir=str(self.path.parent)
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, str(self.path))
+        except OSError:
+            logger.exception("Unable to save scan index %s", self.path)
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+        self.dirty = False
+        logger.info(
+            "Saved scan index with {} directories".format(len(self.dirs))
+        )
+
+    def lookup(self, directory: str, mtime_ns: int):
+        entry = self.dirs.get(directory)
+        if entry is None or entry[0] != mtime_ns:
+            return None
+        return entry[1], entry[2]
+
+    def update(self, directory: str, mtime_ns: int, subdirs: list, files: list):
+        if int(time.time() * 10**9) - mtime_ns < MTIME_RACE_WINDOW_NS:
+            mtime_ns = None
+        self.dirs[directory] = [mtime_ns, subdirs, files]
+        self.dirty = True
+
+    def prune(self, visited: set):
+        stale = self.dirs.keys() - visited
+        for directory in stale:
+            del self.dirs[directory]
+        if stale:
+            self.dirty = True
@@ -0,0 +1,79 @@
+import logging
+import os
+
+from folderplay.constants import MEDIA_SUFFIXES
+from folderplay.scanindex import ScanIndex
+
+logger = logging.getLogger(__name__)
+
+
+def is_media(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in MEDIA_SUFFIXES
+
+
+def list_directory(path: str):
+    """ Lists a single directory.
+
+        Returns a tuple of sorted subdirectory names and sorted media file
+        names. Directory symlinks are returned as well, the caller is
+        responsible for loop detection.
+    """
+    subdirs = []
+    files = []
+    try:
+        entries = list(os.scandir(path))
+    except OSError as e:
+        logger.warning("Unable to list directory %s: %s", path, e)
+        return subdirs, files
+    for entry in entries:
+        try:
+            if entry.is_dir():
+                subdirs.append(entry.name)
+            elif is_media(entry.name) and entry.is_file():
+                files.append(entry.name)
+        except OSError:
+            continue
+    subdirs.sort()
+    files.sort()
+    return subdirs, files
+
+
+def walk_media(root: str, is_cancelled=None, index: ScanIndex = None):
+    """ Walks `root` recursively using `os.scandir`.
+
+        Yields `(directory, media file names)` for every directory that was
+        listed, including the ones without media, so callers can report
+        progress. Stops early when `is_cancelled()` returns True.
+
+        When `index` is given, directories whose mtime did not change since
+        the previous scan are taken from the index instead of being listed.
+    """
+    stack = [root]
+    visited = set()
+    while stack:
+        if is_cancelled is not None and is_cancelled():
+            logger.info("Scan of %s cancelled", root)
+            return
+        path = stack.pop()
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            logger.warning("Unable to stat directory %s: %s", path, e)
+            continue
+        # Protects from symlink loops
+        key = (st.st_dev, st.st_ino) if st.st_ino else os.path.realpath(path)
+        if key in visited:
+            continue
+        visited.add(key)
+
+        listing = None
+        if index is not None:
+            listing = index.lookup(path, st.st_mtime_ns)
+        if listing is None:
+            listing = list_directory(path)
+            if index is not None:
+                index.update(path, st.st_mtime_ns, *listing)
+        subdirs, files = listing
+        # Reversed so that directories are popped in sorted order
+        stack.extend(os.path.join(path, d) for d in reversed(subdirs))
+        yield path, files
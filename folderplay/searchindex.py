@@ -0,0 +1,102 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The index is not used when the rarest trigram of a query is contained in
+# more than this fraction of the titles, a linear pass is cheaper then
+MAX_CANDIDATE_RATIO = 0.25
+
+
+def trigrams(text: str) -> set:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """ In-memory substring index over the titles of medias.
+
+        Maps every lowercase trigram to the medias whose title contains it.
+        Removed medias and replaced titles are left in the posting lists and
+        skipped when queried, the lists are rebuilt once stale entries
+        outnumber live ones.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.titles = {}
+        self.entries = 0
+        self.stale = 0
+
+    def __len__(self):
+        return len(self.titles)
+
+    def clear(self):
+        self.postings = {}
+        self.titles = {}
+        self.entries = 0
+        self.stale = 0
+
+    def add(self, media):
+        title = media.title.lower()
+        self.titles[media] = title
+        grams = trigrams(title)
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(media)
+        self.entries += len(grams)
+
+    def remove(self, media):
+        title = self.titles.pop(media, None)
+        if title is None:
+            return
+        self.stale += len(trigrams(title))
+        if self.stale > self.entries - self.stale:
+            self.compact()
+
+    def update(self, media):
+        """Reindexes a media whose title may have changed."""
+        title = self.titles.get(media)
+        if title is not None and title == media.title.lower():
+            return
+        self.remove(media)
+        self.add(media)
+
+    def compact(self):
+        logger.info(
+            "Compacting search index, {} of {} entries are stale".format(
+                self.stale, self.entries
+            )
+        )
+        medias = list(self.titles)
+        self.clear()
+        for media in medias:
+            self.add(media)
+
+    def candidates(self, text: str):
+        """ Medias whose title may contain `text`, ignoring case, i.e. the
+            intersection of the posting lists of its trigrams, rarest first.
+
+            Returns None when the index cannot narrow down the search, i.e.
+            `text` is shorter than a trigram or is too common. Candidates
+            still have to be verified by the caller.
+        """
+        grams = trigrams(text.lower())
+        if not grams:
+            return None
+        postings = sorted(
+            ((gram, self.postings.get(gram, ())) for gram in grams),
+            key=lambda item: len(item[1]),
+        )
+        rarest = postings[0][1]
+        if len(rarest) > len(self.titles) * MAX_CANDIDATE_RATIO:
+            return None
+        # A media is listed again under its new title after a rename
+        result = {media for media in rarest if media in self.titles}
+        for gram, posting in postings[1:]:
+            if not result:
+                break
+            if len(posting) <= len(result):
+                result.intersection_update(posting)
+            else:
+                # Cheaper than walking a long posting list
+                titles = self.titles
+                result = {m for m in result if gram in titles[m]}
+        return result
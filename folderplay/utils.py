@@ -1,10 +1,11 @@
 import ctypes
+import logging
 import os
 import platform
 import sys
 from pathlib import Path
 
-from PyQt5.QtWidgets import QMessageBox
+from folderplay import __version__ as about
 
 WIN_PATH_PREFIX = "\\\\?\\"
 WIN_MAX_PATH = 259
@@ -52,7 +53,39 @@ def get_registry_value(key, path, value_name):
         return val
 
 
+def cache_dir() -> Path:
+    if is_windows():
+        base = os.getenv("LOCALAPPDATA") or os.path.expanduser("~")
+        path = Path(base, about.__title__, "cache")
+    elif is_macos():
+        path = Path(os.path.expanduser("~/Library/Caches"), about.__title__)
+    else:
+        base = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        path = Path(base, about.__title__)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def data_dir() -> Path:
+    if is_windows():
+        base = os.getenv("LOCALAPPDATA") or os.path.expanduser("~")
+        path = Path(base, about.__title__, "data")
+    elif is_macos():
+        path = Path(
+            os.path.expanduser("~/Library/Application Support"),
+            about.__title__,
+        )
+    else:
+        base = os.getenv("XDG_DATA_HOME") or os.path.expanduser(
+            "~/.local/share"
+        )
+        path = Path(base, about.__title__)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
 def message_box(title, text, icon, buttons):
+    from PyQt5.QtWidgets import QMessageBox
     import folderplay.gui.icons as icons
 
     msg = QMessageBox()
@@ -126,7 +159,21 @@ def win_short_path(long_name: Path) -> str:
     return path
 
 
-def normpath(path: Path) -> Path:
+def normpath(path):
     if is_windows() and len(str(path)) > WIN_MAX_PATH:
-        return Path(WIN_PATH_PREFIX + str(path))
+        return type(path)(WIN_PATH_PREFIX + str(path))
     return path
+
+
+def setup_logging(level=logging.DEBUG):
+    handlers = [logging.StreamHandler(sys.stdout)]
+    logging.basicConfig(
+        handlers=handlers,
+        format=(
+            "{asctime:^} | {levelname: ^8} | "
+            "{filename: ^14} {lineno: <4} | {message}"
+        ),
+        style="{",
+        datefmt="%d.%m.%Y %H:%M:%S",
+        level=level,
+    )
@@ -0,0 +1,324 @@
+import logging
+import os
+import sqlite3
+import time
+from enum import Enum, auto
+from pathlib import Path
+
+from folderplay.constants import WATCHED_PREFIX, WATCHED_STATE_BATCH
+from folderplay.media import unwatched_path
+from folderplay.scanner import walk_media
+from folderplay.utils import WIN_PATH_PREFIX, data_dir, normpath
+
+logger = logging.getLogger(__name__)
+
+
+def strip_long_prefix(path: str) -> str:
+    if path.startswith(WIN_PATH_PREFIX):
+        return path[len(WIN_PATH_PREFIX) :]
+    return path
+
+
+def state_key(path: str) -> str:
+    """Database key of a media file, the watched prefix is ignored."""
+    return os.path.normcase(strip_long_prefix(unwatched_path(path)))
+
+
+def has_prefix(path: str) -> bool:
+    return os.path.basename(path).startswith(WATCHED_PREFIX)
+
+
+class WatchedState:
+    """ Stores the watched flags of medias.
+
+        The default backend renames watched files with `WATCHED_PREFIX`,
+        the flags are read back from the file names.
+    """
+
+    class Backend(Enum):
+        rename = auto()
+        database = auto()
+
+        @classmethod
+        def names(cls):
+            return [e.name for e in cls]
+
+    @staticmethod
+    def create(backend: Backend, workdir: str) -> "WatchedState":
+        if isinstance(backend, str):
+            backend = WatchedState.Backend[backend]
+        logger.info("Setting watched state backend: {}".format(backend.name))
+        if backend == WatchedState.Backend.database:
+            state = DatabaseState(DatabaseState.default_path())
+            state.load(workdir)
+            return state
+        return WatchedState()
+
+    def apply(self, medias: list):
+        """Sets the flags of new medias, file names are enough here."""
+
+    def set_watched(self, medias: list, watched: bool) -> list:
+        """ Sets the watched flags of medias.
+
+            Returns the `(media, path, new path)` renames the flags depend
+            on, the flags are set as if they already succeeded.
+        """
+        renames = []
+        for media in medias:
+            if media.watched != watched:
+                renames.append(
+                    (
+                        media,
+                        media.watched_path(not watched),
+                        media.watched_path(watched),
+                    )
+                )
+                media.watched = watched
+        return renames
+
+    def renamed(self, media, old_path: str):
+        """Called once `media` was renamed outside of the player."""
+
+    def adopt(self, paths: list):
+        """Called with the paths of new files before they are applied."""
+
+    def close(self):
+        pass
+
+
+class DatabaseState(WatchedState):
+    """ Stores the watched flags in a local SQLite database.
+
+        Files are never renamed to mark them watched, which keeps network
+        shares and the paths used by other tools untouched. Medias are keyed
+        by their path without the watched prefix, so files that still carry
+        the prefix count as watched, unwatching them strips it. The inode
+        and size of watched files are stored as well to follow files moved
+        by other tools.
+
+        The flags of a library are loaded into a set once, `apply` costs a
+        set lookup per media. Every change is written in a single
+        transaction.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.conn = None
+        self.keys = set()
+        # (inode, size) -> key of the watched medias, and back
+        self.identities = {}
+        self.locations = {}
+
+    @staticmethod
+    def default_path() -> Path:
+        return data_dir() / "watched.sqlite3"
+
+    @staticmethod
+    def entry(path: str) -> tuple:
+        """Returns the `(key, inode, size)` row of a media file."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return state_key(path), None, None
+        return state_key(path), st.st_ino or None, st.st_size
+
+    def open(self) -> bool:
+        if self.conn is not None:
+            return True
+        try:
+            conn = sqlite3.connect(str(self.path))
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.VERSION:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS watched (key TEXT PRIMARY KEY, "
+                    "inode INTEGER, size INTEGER, watched_at INTEGER)"
+                )
+                conn.execute("PRAGMA user_version = {}".format(self.VERSION))
+                conn.commit()
+        except sqlite3.Error:
+            logger.exception(
+                "Unable to open watched state {}".format(self.path)
+            )
+            return False
+        self.conn = conn
+        return True
+
+    def load(self, workdir: str):
+        """Loads the flags of the medias under `workdir`."""
+        if not self.open():
+            return
+        prefix = os.path.join(os.path.normcase(strip_long_prefix(workdir)), "")
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        try:
+            rows = self.conn.execute(
+                "SELECT key, inode, size FROM watched "
+                "WHERE key >= ? AND key < ?",
+                (prefix, upper),
+            )
+            for key, inode, size in rows:
+                self.keys.add(key)
+                self.track(key, inode, size)
+        except sqlite3.Error:
+            logger.exception("Unable to read watched state")
+        logger.info("Loaded {} watched medias".format(len(self.keys)))
+
+    def add(self, entries: list) -> bool:
+        if not entries:
+            return True
+        if not self.open():
+            return False
+        now = int(time.time())
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO watched VALUES (?, ?, ?, ?)",
+                    (entry + (now,) for entry in entries),
+                )
+        except sqlite3.Error:
+            logger.exception("Unable to write watched state")
+            return False
+        for key, inode, size in entries:
+            self.keys.add(key)
+            self.untrack(key)
+            self.track(key, inode, size)
+        return True
+
+    def remove(self, keys: list) -> bool:
+        if not keys:
+            return True
+        if not self.open():
+            return False
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    "DELETE FROM watched WHERE key = ?",
+                    ((key,) for key in keys),
+                )
+        except sqlite3.Error:
+            logger.exception("Unable to write watched state")
+            return False
+        self.keys.difference_update(keys)
+        for key in keys:
+            self.untrack(key)
+        return True
+
+    def track(self, key: str, inode, size):
+        if inode is None:
+            return
+        # An identity belongs to one key, the file it was taken from is gone
+        self.locations.pop(self.identities.get((inode, size)), None)
+        self.identities[inode, size] = key
+        self.locations[key] = inode, size
+
+    def untrack(self, key: str):
+        identity = self.locations.pop(key, None)
+        if identity is not None:
+            del self.identities[identity]
+
+    def apply(self, medias: list):
+        keys = self.keys
+        if not keys:
+            return
+        for media in medias:
+            if not media.watched and state_key(media.path) in keys:
+                media.watched = True
+
+    def set_watched(self, medias: list, watched: bool) -> list:
+        medias = [m for m in medias if m.watched != watched]
+        renames = []
+        if watched:
+            self.add([self.entry(m.path) for m in medias])
+        else:
+            renames = [
+                (m, m.path, m.watched_path(False))
+                for m in medias
+                if has_prefix(m.path)
+            ]
+            self.remove([state_key(m.path) for m in medias])
+        for media in medias:
+            media.watched = state_key(media.path) in self.keys or (
+                watched and has_prefix(media.path)
+            )
+        return renames
+
+    def renamed(self, media, old_path: str):
+        self.moved(old_path, media.path)
+        self.apply([media])
+
+    def moved(self, old_path: str, new_path: str):
+        old_key = state_key(old_path)
+        if old_key != state_key(new_path) and old_key in self.keys:
+            if self.add([self.entry(new_path)]):
+                self.remove([old_key])
+
+    def adopt(self, paths: list):
+        # Files moved by other tools are reported as removed and added,
+        # the new files are matched by inode and size
+        if not self.identities:
+            return
+        for path in paths:
+            if state_key(path) in self.keys:
+                continue
+            key, inode, size = self.entry(path)
+            old_key = self.identities.get((inode, size))
+            if inode is not None and old_key is not None:
+                logger.info("Watched media moved to {}".format(path))
+                if self.add([(key, inode, size)]):
+                    self.remove([old_key])
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def migrate_watched(workdir: str, strip: bool = False, report=None):
+    """ Imports the watched prefix of the files under `workdir` into the
+        watched database.
+
+        With `strip` the prefix is removed from the file names once their
+        flags are committed, so an interrupted migration loses no flag.
+        `report(imported, renamed)` is called after every batch. Returns the
+        numbers of imported, renamed and failed files.
+    """
+    state = DatabaseState(DatabaseState.default_path())
+    if not state.open():
+        raise OSError("Unable to open {}".format(state.path))
+    imported = renamed = failed = 0
+    batch = []
+
+    def commit():
+        nonlocal imported, renamed, failed
+        if not state.add([state.entry(p) for p in batch]):
+            raise OSError("Unable to write {}".format(state.path))
+        imported += len(batch)
+        for path in batch if strip else ():
+            new_path = unwatched_path(path)
+            if os.path.exists(new_path):
+                logger.error("Cannot rename, file already exists %s", new_path)
+                failed += 1
+                continue
+            try:
+                os.rename(path, new_path)
+            except OSError:
+                logger.exception("Error while renaming %s", path)
+                failed += 1
+            else:
+                renamed += 1
+        batch.clear()
+        if report is not None:
+            report(imported, renamed)
+
+    try:
+        for directory, files in walk_media(workdir):
+            for name in files:
+                if name.startswith(WATCHED_PREFIX):
+                    batch.append(normpath(os.path.join(directory, name)))
+            if len(batch) >= WATCHED_STATE_BATCH:
+                commit()
+        commit()
+    finally:
+        state.close()
+    return imported, renamed, failed
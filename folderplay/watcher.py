@@ -0,0 +1,231 @@
+import logging
+import os
+import time
+from enum import Enum, auto
+
+from PyQt5.QtCore import (
+    QObject,
+    QThread,
+    QTimer,
+    QFileSystemWatcher,
+    pyqtSignal,
+)
+
+from folderplay.constants import (
+    WATCHED_PREFIX,
+    WATCHER_COALESCE_INTERVAL,
+    WATCHER_MAX_DELAY,
+    WATCHER_POLL_INTERVAL,
+)
+from folderplay.scanindex import ScanIndex
+from folderplay.scanner import walk_media
+from folderplay.utils import normpath
+
+logger = logging.getLogger(__name__)
+
+
+def unwatched_name(name: str) -> str:
+    if name.startswith(WATCHED_PREFIX):
+        return name[len(WATCHED_PREFIX) :]
+    return name
+
+
+class DirectoryRescan(QThread):
+    # Added paths, removed paths, renamed (old path, new path) pairs
+    changed = pyqtSignal(list, list, list)
+    # Directories that appeared or disappeared during the rescan
+    directories_changed = pyqtSignal(list, list)
+
+    def __init__(self, index: ScanIndex, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.index = index
+        self.directories = set()
+        self.poll = False
+
+    def changed_directories(self):
+        """Directories whose mtime differs from the index."""
+        res = set()
+        for directory, entry in list(self.index.dirs.items()):
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                mtime_ns = None
+            if mtime_ns != entry[0]:
+                res.add(directory)
+        return res
+
+    def run(self):
+        directories = set(self.directories)
+        if self.poll:
+            directories |= self.changed_directories()
+        added, removed, renamed = [], [], []
+        dirs_added, dirs_removed = [], []
+        # Children of another changed directory are rescanned with it
+        for directory in sorted(directories):
+            parent = os.path.dirname(directory)
+            while parent != os.path.dirname(parent):
+                if parent in directories:
+                    break
+                parent = os.path.dirname(parent)
+            else:
+                self.rescan(
+                    directory, added, removed, renamed, dirs_added, dirs_removed
+                )
+        if added or removed or renamed:
+            self.index.save()
+            self.changed.emit(added, removed, renamed)
+        if dirs_added or dirs_removed:
+            self.directories_changed.emit(dirs_added, dirs_removed)
+
+    def rescan(self, root, added, removed, renamed, dirs_added, dirs_removed):
+        prefix = os.path.join(root, "")
+        before = {
+            d: entry[2]
+            for d, entry in self.index.dirs.items()
+            if d == root or d.startswith(prefix)
+        }
+        after = {}
+        if os.path.isdir(root):
+            after = dict(walk_media(root, index=self.index))
+        for directory in before.keys() - after.keys():
+            del self.index.dirs[directory]
+            self.index.dirty = True
+            dirs_removed.append(directory)
+        dirs_added.extend(after.keys() - before.keys())
+
+        for directory in before.keys() | after.keys():
+            old = set(before.get(directory, ()))
+            new = set(after.get(directory, ()))
+            if old == new:
+                continue
+            gone = old - new
+            appeared = {unwatched_name(f): f for f in new - old}
+            for name in sorted(gone):
+                old_path = normpath(os.path.join(directory, name))
+                new_name = appeared.pop(unwatched_name(name), None)
+                if new_name is None:
+                    removed.append(old_path)
+                else:
+                    # Watched status toggled
+                    renamed.append(
+                        (old_path, normpath(os.path.join(directory, new_name)))
+                    )
+            added.extend(
+                normpath(os.path.join(directory, f))
+                for f in sorted(appeared.values())
+            )
+
+
+class MediaWatcher(QObject):
+    class Mode(Enum):
+        native = auto()
+        poll = auto()
+        off = auto()
+
+        @classmethod
+        def names(cls):
+            return [e.name for e in cls]
+
+    # Added paths, removed paths, renamed (old path, new path) pairs
+    changed = pyqtSignal(list, list, list)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mode = self.Mode.off
+        self.index = None
+        self.rescan = None
+        self.pending = set()
+        self.first_pending = None
+
+        self.fs_watcher = QFileSystemWatcher(self)
+        self.fs_watcher.directoryChanged.connect(self.directory_changed)
+
+        # Bursts of events are merged into a single rescan
+        self.coalesce_timer = QTimer(self)
+        self.coalesce_timer.setSingleShot(True)
+        self.coalesce_timer.setInterval(WATCHER_COALESCE_INTERVAL)
+        self.coalesce_timer.timeout.connect(self.flush)
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(WATCHER_POLL_INTERVAL)
+        self.poll_timer.timeout.connect(self.flush)
+
+    def set_mode(self, mode: Mode):
+        if isinstance(mode, str):
+            mode = self.Mode[mode]
+        logger.info("Setting watcher mode: {}".format(mode.name))
+        self.mode = mode
+
+    def start(self, index: ScanIndex):
+        self.stop()
+        if self.mode == self.Mode.off:
+            return
+        self.index = index
+        self.rescan = DirectoryRescan(index, self)
+        self.rescan.changed.connect(self.changed)
+        self.rescan.directories_changed.connect(self.update_watched_dirs)
+        self.rescan.finished.connect(self.rescan_finished)
+        if self.mode == self.Mode.native:
+            self.update_watched_dirs(list(index.dirs), [])
+        else:
+            self.poll_timer.start()
+        logger.info(
+            "Watching {} directories ({})".format(
+                len(index.dirs), self.mode.name
+            )
+        )
+
+    def stop(self):
+        self.poll_timer.stop()
+        self.coalesce_timer.stop()
+        self.pending.clear()
+        self.first_pending = None
+        watched_dirs = self.fs_watcher.directories()
+        if watched_dirs:
+            self.fs_watcher.removePaths(watched_dirs)
+        if self.rescan is not None:
+            self.rescan.changed.disconnect()
+            self.rescan.wait()
+            self.rescan.deleteLater()
+            self.rescan = None
+        self.index = None
+
+    def update_watched_dirs(self, dirs_added: list, dirs_removed: list):
+        if self.mode != self.Mode.native:
+            return
+        if dirs_removed:
+            self.fs_watcher.removePaths(dirs_removed)
+        if dirs_added:
+            failed = self.fs_watcher.addPaths(dirs_added)
+            if failed:
+                logger.warning(
+                    "Unable to watch {} directories".format(len(failed))
+                )
+
+    def directory_changed(self, path: str):
+        self.pending.add(path)
+        now = time.monotonic()
+        if self.first_pending is None:
+            self.first_pending = now
+        # Keep postponing while the burst lasts, but not forever
+        if now - self.first_pending < WATCHER_MAX_DELAY / 1000:
+            self.coalesce_timer.start()
+
+    def flush(self):
+        if self.rescan is None or self.rescan.isRunning():
+            # Picked up by `rescan_finished`
+            return
+        if not self.pending and self.mode != self.Mode.poll:
+            return
+        logger.info(
+            "Rescanning {} changed directories".format(len(self.pending))
+        )
+        self.rescan.directories = self.pending
+        self.rescan.poll = self.mode == self.Mode.poll
+        self.pending = set()
+        self.first_pending = None
+        self.rescan.start()
+
+    def rescan_finished(self):
+        if self.pending and not self.coalesce_timer.isActive():
+            self.flush()